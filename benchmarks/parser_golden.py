@@ -0,0 +1,117 @@
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from congress_trades.ptr import clean_pdf_text, parse_pdf, process_cleaned_text
+
+# Extracted PTR text, one file per filing named {Year}_{DocID}.txt, with the expected records next to it as .json
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'ptr_text')
+
+# PTR PDFs laid out like the clerk's e-filed forms (wrapped cells, "(partial)" sales, notes under
+# assets, trailing comments pages), named {Year}_{DocID}.pdf, with the true records next to them as .json
+PDF_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'ptr_pdf')
+
+EXTRACTIONS = ['layout', 'text']
+
+
+def load_fixtures(fixture_dir=FIXTURE_DIR):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, '*.txt'))):
+        year, doc_id = os.path.splitext(os.path.basename(path))[0].split('_')
+        with open(path, encoding='utf-8') as f:
+            fixtures.append((path, int(year), doc_id, f.read()))
+    return fixtures
+
+
+def load_pdf_fixtures(fixture_dir=PDF_FIXTURE_DIR):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, '*.pdf'))):
+        year, doc_id = os.path.splitext(os.path.basename(path))[0].split('_')
+        with open(path, 'rb') as f:
+            fixtures.append((path, int(year), doc_id, f.read()))
+    return fixtures
+
+
+def parse(text, year, doc_id):
+    return process_cleaned_text(clean_pdf_text(text), year, doc_id)
+
+
+# JSON-friendly records: lists with NaN written as null
+def to_json_records(records):
+    return [[None if isinstance(value, float) and math.isnan(value) else value for value in record] for record in records]
+
+
+# Compare every fixture against its golden file and time the parse; returns the number of mismatches
+def check(fixtures, repeat):
+    mismatches = 0
+    for path, year, doc_id, text in fixtures:
+        with open(os.path.splitext(path)[0] + '.json') as f:
+            expected = json.load(f)
+        actual = to_json_records(parse(text, year, doc_id))
+        if actual != expected:
+            mismatches += 1
+            print(f"MISMATCH {os.path.basename(path)}: expected {len(expected)} records, got {len(actual)}")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, year, doc_id, text in fixtures:
+            parse(text, year, doc_id)
+    elapsed = time.perf_counter() - start
+    docs = len(fixtures) * repeat
+    print(f"{len(fixtures)} fixtures, {mismatches} mismatches, {docs / elapsed:,.0f} docs/sec "
+          f"({elapsed / docs * 1e6:,.1f} us/doc)")
+    return mismatches
+
+
+# Parse every PDF fixture with each extraction mode, compare with the true records and time it.
+# Returns the number of layout mismatches; text mismatches are reported for comparison only.
+def check_pdf(fixtures, repeat):
+    layout_mismatches = 0
+    for extraction in EXTRACTIONS:
+        mismatches = 0
+        for path, year, doc_id, content in fixtures:
+            with open(os.path.splitext(path)[0] + '.json') as f:
+                expected = json.load(f)
+            if to_json_records(parse_pdf(content, year, doc_id, extraction)) != expected:
+                mismatches += 1
+                if extraction == 'layout':
+                    print(f"MISMATCH {os.path.basename(path)} ({extraction})")
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for _, year, doc_id, content in fixtures:
+                parse_pdf(content, year, doc_id, extraction)
+        elapsed = time.perf_counter() - start
+        docs = len(fixtures) * repeat
+        print(f"{len(fixtures)} PDFs, {extraction} extraction: {mismatches} mismatches, {docs / elapsed:,.0f} docs/sec "
+              f"({elapsed / docs * 1e3:,.1f} ms/doc)")
+        if extraction == 'layout':
+            layout_mismatches = mismatches
+    return layout_mismatches
+
+
+def update(fixtures):
+    for path, year, doc_id, text in fixtures:
+        with open(os.path.splitext(path)[0] + '.json', 'w') as f:
+            json.dump(to_json_records(parse(text, year, doc_id)), f, indent=1)
+            f.write('\n')
+    print(f"Rewrote {len(fixtures)} golden files")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the PTR parser against the golden corpus and time it.")
+    parser.add_argument('--update', action='store_true', help="rewrite the golden files from the current parser")
+    parser.add_argument('--repeat', type=int, default=200, help="timing passes over the corpus")
+    parser.add_argument('--pdf-repeat', type=int, default=5, help="timing passes over the PDF fixtures")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    if args.update:
+        update(fixtures)
+    else:
+        mismatches = check(fixtures, args.repeat) + check_pdf(load_pdf_fixtures(), args.pdf_repeat)
+        sys.exit(1 if mismatches else 0)
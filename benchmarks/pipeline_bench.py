@@ -0,0 +1,258 @@
+import argparse
+import functools
+import http.server
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extensions import make_dsn
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, REPO_DIR)
+
+# Recorded clerk site (public_disc/financial-pdfs/{Year}FD.zip and public_disc/ptr-pdfs/{Year}/{DocID}.pdf),
+# daily closes (prices.csv.gz) and ticker metadata (metadata.json)
+CORPUS_DIR = os.path.join(BENCH_DIR, 'fixtures', 'corpus')
+
+# Per-stage timings of an earlier run; stages slower than this by more than the tolerance are flagged
+BASELINE_PATH = os.path.join(BENCH_DIR, 'pipeline_baseline.json')
+
+# Scratch schema the insert stage loads into; created and dropped by every run
+BENCH_SCHEMA = 'congress_bench'
+
+STAGES = ['index', 'pdf_url_to_text', 'parse', 'records_to_frame', 'merge_stock_data', 'clean', 'insert']
+
+# Stage slowdowns below this many seconds are treated as noise
+NOISE_SECONDS = 0.005
+
+
+# Ticker metadata recorded from yfinance, served through the yf.Ticker interface. The recorded
+# daily closes are read by the price store's FileProvider instead.
+class RecordedMarket:
+    def __init__(self, corpus_dir=CORPUS_DIR):
+        with open(os.path.join(corpus_dir, 'metadata.json')) as f:
+            self.metadata = json.load(f)
+
+    def Ticker(self, ticker):
+        return RecordedTicker(self, ticker)
+
+
+class RecordedTicker:
+    def __init__(self, market, ticker):
+        self.market = market
+        self.ticker = ticker
+
+    @property
+    def info(self):
+        return dict(self.market.metadata.get(self.ticker, {}))
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+# Serve the recorded clerk site on a local port; returns the server and its base URL
+def serve_corpus(corpus_dir=CORPUS_DIR):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_QuietHandler, directory=corpus_dir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+# Connection string of the database the insert stage uses: --dsn if given, otherwise an
+# embedded PostgreSQL from the optional pgserver package, otherwise None (insert is skipped)
+def open_database(dsn, data_dir):
+    if dsn is not None:
+        return dsn, None
+    try:
+        import pgserver
+    except ImportError:
+        print("No --dsn and pgserver is not installed; skipping the insert stage.")
+        return None, None
+    server = pgserver.get_server(os.path.join(data_dir, 'pgdata'), cleanup_mode='stop')
+    return server.get_uri(), server
+
+
+# (Re)create the scratch schema with the repo's table definitions
+def reset_schema(dsn):
+    with open(os.path.join(REPO_DIR, 'schema', 'congress_stock_trades_schema.sql')) as f:
+        schema_sql = f.read()
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+            cursor.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+            cursor.execute(f"SET search_path TO {BENCH_SCHEMA}")
+            cursor.execute(schema_sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def drop_schema(dsn):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Wall time of each stage with the number of documents and rows it handled
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, docs=0, rows=0):
+        start = time.perf_counter()
+        yield
+        self.stages[name] = {'seconds': time.perf_counter() - start, 'docs': docs, 'rows': rows}
+
+
+# One pass over the corpus, stage by stage. Every filing is parsed scale times under distinct
+# DocIDs so the row-oriented stages see a realistic volume.
+def run_stages(years, scale, dsn, cache_dir):
+    from congress_trades import db
+    from congress_trades.disclosure_index import download_index, ptr_document_ids
+    from congress_trades.enrich import merge_stock_data
+    from congress_trades.fetch import HEADERS, ptr_pdf_url
+    from congress_trades.frames import clean_trades, records_to_frame
+    from congress_trades.loader import upsert_trades
+    from congress_trades.metadata_cache import MetadataCache
+    from congress_trades.price_provider import FileProvider
+    from congress_trades.price_store import PriceStore
+    from congress_trades.ptr import clean_pdf_text, pdf_url_to_text, process_cleaned_text
+
+    # Cold caches every pass so each pass does the same work
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    price_store = PriceStore(os.path.join(cache_dir, 'prices'), provider=FileProvider(os.path.join(CORPUS_DIR, 'prices.csv.gz')))
+    metadata_cache = MetadataCache(os.path.join(cache_dir, 'ticker_metadata.sqlite3'))
+
+    timer = StageTimer()
+    doc_ids = []
+    with timer.stage('index', docs=len(years)):
+        for year in years:
+            doc_ids.extend(ptr_document_ids(download_index(year)))
+
+    with timer.stage('pdf_url_to_text', docs=len(doc_ids)):
+        texts = [(year, doc_id, pdf_url_to_text(ptr_pdf_url(year, doc_id), HEADERS)) for year, doc_id in doc_ids]
+
+    copies = [(year, str(int(doc_id) * 1000 + copy), text) for copy in range(scale) for year, doc_id, text in texts]
+    with timer.stage('parse', docs=len(copies)):
+        records = []
+        for year, doc_id, text in copies:
+            records.extend(process_cleaned_text(clean_pdf_text(text), year, doc_id))
+
+    with timer.stage('records_to_frame', rows=len(records)):
+        df = records_to_frame(records)
+
+    with timer.stage('merge_stock_data', rows=len(df)):
+        df = merge_stock_data(df, price_store, metadata_cache)
+
+    with timer.stage('clean', rows=len(df)):
+        df = clean_trades(df)
+
+    if dsn is not None:
+        reset_schema(dsn)
+        with timer.stage('insert', rows=len(df)):
+            with db.transaction() as conn:
+                upsert_trades(conn, df)
+    return timer.stages
+
+
+# Fastest time of each stage over all passes
+def best_of(passes):
+    best = {}
+    for stages in passes:
+        for name, result in stages.items():
+            if name not in best or result['seconds'] < best[name]['seconds']:
+                best[name] = result
+    return best
+
+
+def report(stages, baseline, tolerance):
+    regressions = []
+    print(f"{'stage':<18}{'seconds':>10}{'docs/sec':>12}{'rows/sec':>14}{'baseline':>11}")
+    for name in STAGES:
+        if name not in stages:
+            continue
+        result = stages[name]
+        seconds = result['seconds']
+        docs_rate = f"{result['docs'] / seconds:,.0f}" if result['docs'] else '-'
+        rows_rate = f"{result['rows'] / seconds:,.0f}" if result['rows'] else '-'
+        flag = ''
+        previous = baseline.get('stages', {}).get(name) if baseline else None
+        if previous is not None:
+            change = seconds / previous['seconds'] - 1
+            flag = f"{change:+.0%}"
+            if change > tolerance and seconds - previous['seconds'] > NOISE_SECONDS:
+                regressions.append(name)
+                flag += ' REGRESSION'
+        print(f"{name:<18}{seconds:>10.4f}{docs_rate:>12}{rows_rate:>14}  {flag}")
+    print(f"peak RSS {peak_rss_mb():,.0f} MB")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every pipeline stage offline against the recorded corpus.")
+    parser.add_argument('--dsn', help="PostgreSQL to load into (a scratch schema is created and dropped); "
+                                      "defaults to an embedded server from pgserver")
+    parser.add_argument('--scale', type=int, default=50, help="times each filing is parsed and loaded under a new DocID")
+    parser.add_argument('--repeat', type=int, default=3, help="passes over the corpus; the fastest time per stage is kept")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="slowdown against the baseline flagged as a regression")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline file to compare against or save to")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run's timings as the baseline")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='congress_bench_')
+    server, clerk_url = serve_corpus()
+    dsn, db_server = open_database(args.dsn, work_dir)
+    try:
+        # The package reads its settings at import time, so point it at the stand-ins first
+        os.environ['CONGRESS_TRADES_CLERK_URL'] = clerk_url
+        os.environ['CONGRESS_TRADES_CACHE_DIR'] = os.path.join(work_dir, 'cache')
+        if dsn is not None:
+            os.environ['CONGRESS_TRADES_DSN'] = make_dsn(dsn, options=f'-c search_path={BENCH_SCHEMA}')
+
+        from congress_trades import db, metadata_cache
+        metadata_cache.yf = RecordedMarket()
+
+        years = sorted(int(name[:4]) for name in os.listdir(os.path.join(CORPUS_DIR, 'public_disc', 'financial-pdfs')))
+        passes = [run_stages(years, args.scale, dsn, os.path.join(work_dir, 'cache'))
+                  for _ in range(args.repeat)]
+        db.close_pool()
+        stages = best_of(passes)
+
+        baseline = None
+        if not args.save_baseline and os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        regressions = report(stages, baseline, args.tolerance)
+
+        if args.save_baseline:
+            with open(args.baseline, 'w') as f:
+                json.dump({'stages': stages, 'peak_rss_mb': peak_rss_mb(), 'scale': args.scale}, f, indent=1)
+                f.write('\n')
+            print(f"Saved baseline to {args.baseline}")
+        elif baseline is None:
+            print("No baseline yet; run with --save-baseline to store one.")
+    finally:
+        if dsn is not None:
+            drop_schema(dsn)
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,84 @@
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from congress_trades.price_provider import PRICE_DTYPE
+from congress_trades.price_store import PriceStore
+
+# Days of history the stand-in provider serves, ending yesterday
+HISTORY_DAYS = 400
+
+
+# Stand-in for yfinance's adjusted closes: every ticker trades at 100 a day, and after split(ticker,
+# ratio) the whole history of that ticker is divided by ratio, as an adjusted download would be
+class SplitProvider:
+    def __init__(self):
+        self.ratios = {}
+        self.calls = []
+
+    def split(self, ticker, ratio):
+        self.ratios[ticker] = self.ratios.get(ticker, 1) * ratio
+
+    def download(self, tickers, start, end):
+        self.calls.append((sorted(tickers), start))
+        days = np.arange(np.datetime64(end, 'D') - HISTORY_DAYS, np.datetime64(end, 'D'))
+        if start is not None:
+            days = days[days >= np.datetime64(start, 'D')]
+        prices = {}
+        for ticker in tickers:
+            prices[ticker] = np.empty(len(days), dtype=PRICE_DTYPE)
+            prices[ticker]['date'] = days
+            prices[ticker]['close'] = 100 / self.ratios.get(ticker, 1)
+        return prices
+
+
+# Forget the last days of a stored ticker, as if the store was last brought up to date then
+def rewind(store, ticker, days):
+    prices = np.asarray(store.series(ticker))[:-days]
+    store._write_series(ticker, prices)
+    store._index[ticker]['end'] = str(prices['date'][-1])
+
+
+# Store histories, split one ticker inside its stored range and bring the store up to date again.
+# Every stored series must still be on a single basis. Returns the number of failures.
+def check_split():
+    failures = 0
+    provider = SplitProvider()
+    store = PriceStore(tempfile.mkdtemp(), provider=provider)
+    yesterday = date.today() - timedelta(days=1)
+    store.ensure_many({'NVDA': yesterday, 'AAPL': yesterday, 'MSFT': yesterday})
+    # MSFT last updated further back, so its range is merged with NVDA's in one download
+    rewind(store, 'NVDA', 20)
+    rewind(store, 'AAPL', 20)
+    rewind(store, 'MSFT', 60)
+    provider.split('NVDA', 10)
+    provider.calls.clear()
+    errors = store.ensure_many({'NVDA': yesterday, 'AAPL': yesterday, 'MSFT': yesterday})
+    if errors:
+        failures += 1
+        print(f"FAIL download errors: {errors}")
+    for ticker, close in [('NVDA', 10.0), ('AAPL', 100.0), ('MSFT', 100.0)]:
+        prices = np.asarray(store.series(ticker))
+        closes = set(prices['close'].tolist())
+        if closes != {close}:
+            failures += 1
+            print(f"FAIL {ticker}: stored closes {sorted(closes)}, expected only {close}")
+        if len(prices) != HISTORY_DAYS:
+            failures += 1
+            print(f"FAIL {ticker}: {len(prices)} stored days, expected {HISTORY_DAYS}")
+    if (['NVDA'], None) not in provider.calls:
+        failures += 1
+        print(f"FAIL NVDA was not downloaded again in full: {provider.calls}")
+    if any(start is None and tickers != ['NVDA'] for tickers, start in provider.calls):
+        failures += 1
+        print(f"FAIL tickers without a split were downloaded in full: {provider.calls}")
+    print(f"split inside the stored range: {failures} failures, {len(provider.calls)} downloads")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if check_split() else 0)
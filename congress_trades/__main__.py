@@ -0,0 +1,5 @@
+import sys
+
+from congress_trades.cli import main
+
+sys.exit(main())
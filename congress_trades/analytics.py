@@ -0,0 +1,129 @@
+import psycopg2
+
+from congress_trades import db, metrics
+
+# Summary table and dashboard view for each grouping of congress_trade_returns
+DIMENSIONS = {
+    'Representative': ('congress_representative_stats', 'congress_representative_performance'),
+    'Sector': ('congress_sector_stats', 'congress_sector_performance'),
+    'Ticker': ('congress_ticker_stats', 'congress_ticker_performance'),
+}
+
+# Additive columns of the summary tables, as computed from signed rows of analytics_delta
+STAT_COLUMNS = {
+    'Trades': "SUM(sign)",
+    'Purchases': "SUM(sign * (Transaction_Type = 'P')::INT)",
+    'Sales': "SUM(sign * (Transaction_Type = 'S')::INT)",
+    'Amount': "COALESCE(SUM(sign * Amount), 0)",
+    'Trade_Return_50_Sum': "COALESCE(SUM(sign * Trade_Return_50_Days), 0)",
+    'Trade_Return_50_Count': "SUM(sign * (Trade_Return_50_Days IS NOT NULL)::INT)",
+    'Trade_Return_100_Sum': "COALESCE(SUM(sign * Trade_Return_100_Days), 0)",
+    'Trade_Return_100_Count': "SUM(sign * (Trade_Return_100_Days IS NOT NULL)::INT)",
+    'Lag_Sum': "COALESCE(SUM(sign * Notification_Lag_Days), 0)",
+    'Lag_Count': "SUM(sign * (Notification_Lag_Days IS NOT NULL)::INT)",
+    'Late_Notifications': "SUM(sign * (Notification_Lag_Days > 45)::INT)",
+}
+
+# Serializes refreshes so two runs never apply the same trade's difference twice
+REFRESH_LOCK_ID = 0x636f6e67
+
+
+# Per-trade row of congress_trade_returns computed from congress_stock_trades
+TRADE_RETURNS_SELECT = """
+SELECT t.record_id, t.Year,
+       COALESCE(t.Representative, 'Unknown'), COALESCE(t.Ticker, 'Unknown'), COALESCE(t.Sector, 'Unknown'),
+       t.Transaction_Type, t.Date, t.Amount,
+       t.Notification_Date - t.Date,
+       r.Return_50, r.Return_100,
+       CASE t.Transaction_Type WHEN 'P' THEN r.Return_50 WHEN 'S' THEN -r.Return_50 END,
+       CASE t.Transaction_Type WHEN 'P' THEN r.Return_100 WHEN 'S' THEN -r.Return_100 END
+FROM congress_stock_trades t
+JOIN analytics_changed c ON c.record_id = t.record_id
+CROSS JOIN LATERAL (
+    SELECT NULLIF(t.Price_in_50_Days, 'NaN') / NULLIF(NULLIF(t.Average_Price, 'NaN'), 0) - 1 AS Return_50,
+           NULLIF(t.Price_in_100_Days, 'NaN') / NULLIF(NULLIF(t.Average_Price, 'NaN'), 0) - 1 AS Return_100
+) r
+"""
+
+
+# Bring the analytics tables up to date with every trade inserted, changed or deleted since
+# the last refresh. The changed trades' old rows are subtracted from the summary tables and
+# their new rows added, so the cost grows with the number of changed trades, not the table.
+# Returns the number of trades refreshed; the caller commits.
+def refresh_analytics(conn):
+    with conn.cursor() as cursor, metrics.timer('analytics_refresh_seconds'):
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (REFRESH_LOCK_ID,))
+        cursor.execute("""
+        CREATE TEMP TABLE analytics_changed ON COMMIT DROP AS
+        WITH claimed AS (DELETE FROM congress_analytics_dirty RETURNING record_id)
+        SELECT DISTINCT record_id FROM claimed
+        """)
+        cursor.execute("SELECT COUNT(*) FROM analytics_changed")
+        changed = cursor.fetchone()[0]
+        if changed:
+            cursor.execute("""
+            CREATE TEMP TABLE analytics_delta ON COMMIT DROP AS
+            SELECT -1 AS sign, r.* FROM congress_trade_returns r JOIN analytics_changed c USING (record_id)
+            """)
+            cursor.execute("DELETE FROM congress_trade_returns r USING analytics_changed c WHERE r.record_id = c.record_id")
+            cursor.execute("INSERT INTO congress_trade_returns " + TRADE_RETURNS_SELECT)
+            cursor.execute("""
+            INSERT INTO analytics_delta
+            SELECT 1, r.* FROM congress_trade_returns r JOIN analytics_changed c USING (record_id)
+            """)
+            for dimension, (table, _) in DIMENSIONS.items():
+                _apply_delta(cursor, dimension, table)
+        cursor.execute("DROP TABLE analytics_changed")
+        cursor.execute("DROP TABLE IF EXISTS analytics_delta")
+    metrics.inc('analytics_trades_refreshed_total', changed)
+    return changed
+
+
+# Whether the optional analytics schema is installed
+def analytics_installed(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('congress_analytics_dirty') IS NOT NULL")
+        return cursor.fetchone()[0]
+
+
+# Fold the changes made by a run into the analytics tables in their own transaction. Databases
+# without the analytics schema are skipped; a failed refresh is counted with metrics.error, so the
+# command exits nonzero.
+def update_analytics():
+    try:
+        with db.transaction() as conn:
+            if analytics_installed(conn):
+                print(f"Refreshed analytics for {refresh_analytics(conn)} trades.")
+    except psycopg2.Error as err:
+        print(f"Error refreshing analytics: {err}")
+        metrics.error('analytics', error=str(err))
+
+
+# Add the signed per-group differences to one summary table and drop groups left without trades
+def _apply_delta(cursor, dimension, table):
+    columns = ', '.join(STAT_COLUMNS)
+    cursor.execute(f"""
+    INSERT INTO {table} AS s ({dimension}, {columns})
+    SELECT {dimension}, {', '.join(STAT_COLUMNS.values())}
+    FROM analytics_delta
+    GROUP BY {dimension}
+    ON CONFLICT ({dimension}) DO UPDATE
+    SET {', '.join(f'{column} = s.{column} + EXCLUDED.{column}' for column in STAT_COLUMNS)}
+    """)
+    cursor.execute(f"DELETE FROM {table} WHERE Trades <= 0")
+
+
+# One dashboard view (Representative, Sector or Ticker) as a DataFrame, best 50-day performers first
+def performance(conn, dimension='Representative', min_trades=1, limit=None):
+    import pandas as pd
+    _, view = DIMENSIONS[dimension]
+    query = (f"SELECT * FROM {view} WHERE Trades >= %s "
+             f"ORDER BY Avg_Trade_Return_50_Days DESC NULLS LAST")
+    params = [min_trades]
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    with conn.cursor() as cursor:
+        cursor.execute(query, params)
+        columns = [column.name for column in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
@@ -0,0 +1,125 @@
+import functools
+
+import psycopg2
+
+from congress_trades import db, metrics
+from congress_trades.disclosure_index import download_index, ptr_document_ids
+from congress_trades.ledger import FAILED, LOADED, complete_year, completed_years, failed_documents, find_new_documents, record_document
+
+# Years loaded by a full backfill
+FIRST_YEAR = 2014
+LAST_YEAR = 2024
+
+
+# Lazily yield (Year, DocID) for every PTR filed in the given years, one index download at a time.
+# Each year's full list is kept in indexed so the year can be checkpointed once it is loaded;
+# with resume, filings already loaded by an earlier run are skipped.
+def index_documents(years, indexed, resume=False):
+    for year in years:
+        print(f"Processing data for year {year}...")
+        with metrics.timer('stage_seconds', stage='index'):
+            rows = download_index(year)
+        if rows is None:
+            print(f"Failed to retrieve document IDs for year {year}.")
+            metrics.error('index', year=year)
+            continue
+        print(f"Successfully downloaded data for {year}")
+        doc_ids = ptr_document_ids(rows)
+        indexed[year] = doc_ids
+        if resume:
+            with db.transaction() as conn:
+                doc_ids = find_new_documents(conn, doc_ids)
+            print(f"{len(doc_ids)} filings left to process for {year}")
+        yield from doc_ids
+
+
+# Load one chunk and checkpoint the filings it completes in the same transaction over a pooled connection.
+# Stored lines of a completed filing that it no longer has are deleted with it. If the load fails,
+# those filings are recorded as failed instead so --resume retries them. Returns whether the
+# chunk was committed.
+def insert_data_in_batches(data, completed):
+    from congress_trades.loader import delete_stale_lines, upsert_trades
+    try:
+        with db.transaction() as conn:
+            if len(data):
+                upsert_trades(conn, data)
+            for document, lines in completed:
+                if document.error is not None:
+                    record_document(conn, document.Year, document.DocID, FAILED, 0, document.Content_Hash, document.error)
+                else:
+                    delete_stale_lines(conn, document.Year, document.DocID, lines)
+                    record_document(conn, document.Year, document.DocID, LOADED, len(lines), document.Content_Hash)
+    except psycopg2.Error as err:
+        print(f"Error: {err}")
+        metrics.error('load', error=str(err))
+        record_failures(completed, err)
+        return False
+    return True
+
+
+# Record every filing of a chunk that could not be loaded
+def record_failures(completed, error):
+    try:
+        with db.transaction() as conn:
+            for document, _ in completed:
+                record_document(conn, document.Year, document.DocID, FAILED, 0, document.Content_Hash, str(error))
+    except psycopg2.Error as err:
+        print(f"Error: {err}")
+        metrics.error('ledger', error=str(err))
+
+
+# Checkpoint every indexed year that has no filing left to process
+def checkpoint_years(indexed):
+    with db.transaction() as conn:
+        for year, doc_ids in indexed.items():
+            if complete_year(conn, year, doc_ids):
+                print(f"Year {year} complete.")
+            else:
+                print(f"Year {year} has failed filings; run again with --resume to retry them.")
+
+
+# Print the dead-letter list of filings whose last attempt failed
+def print_dead_letters():
+    with db.connection() as conn:
+        failed = failed_documents(conn)
+    for year, doc_id, attempts, error, updated_at in failed:
+        print(f"{year}\t{doc_id}\t{attempts} attempts\t{updated_at:%Y-%m-%d %H:%M}\t{error}")
+    print(f"{len(failed)} failed filings.")
+
+
+# Stream every year's filings through fetch, parse, enrich, clean and load. With resume, completed
+# years are skipped before anything heavy is imported, so a finished backfill exits at once.
+def run(resume=False, first_year=FIRST_YEAR, last_year=LAST_YEAR):
+    years = range(first_year, last_year + 1)
+    if resume:
+        with db.connection() as conn:
+            done = completed_years(conn)
+        years = [year for year in years if year not in done]
+        print(f"Resuming; skipping completed years {sorted(done)}")
+        if not years:
+            print("Every year is complete.")
+            return 0
+
+    from congress_trades.analytics import update_analytics
+    from congress_trades.doc_cache import DocumentCache
+    from congress_trades.enrich import merge_stock_data
+    from congress_trades.fetch import PdfFetcher
+    from congress_trades.frames import clean_trades
+    from congress_trades.metadata_cache import MetadataCache
+    from congress_trades.parse_pool import ParsePool
+    from congress_trades.pipeline import run_pipeline
+    from congress_trades.price_store import PriceStore
+
+    document_cache = DocumentCache()
+    enrich = functools.partial(merge_stock_data, price_store=PriceStore(), metadata_cache=MetadataCache())
+    indexed = {}
+    fetcher = PdfFetcher(cache=document_cache)
+    with ParsePool(cache=document_cache) as parse_pool:
+        rows = run_pipeline(
+            index_documents(years, indexed, resume), fetcher, parse_pool,
+            enrich=enrich, clean=clean_trades, load=insert_data_in_batches
+        )
+    checkpoint_years(indexed)
+    update_analytics()
+    print(f"Inserted {rows} rows.")
+    return rows
@@ -0,0 +1,89 @@
+import argparse
+import importlib
+
+from congress_trades import config, db, metrics
+
+# Module of each subcommand; it is only imported when that subcommand runs, so every command
+# pays for the dependencies it uses and nothing else
+COMMANDS = {
+    'backfill': 'congress_trades.backfill',
+    'enqueue': 'congress_trades.distributed',
+    'work': 'congress_trades.distributed',
+    'update': 'congress_trades.update',
+    'watch': 'congress_trades.watch',
+    'update-prices': 'congress_trades.price_backfill',
+    'export': 'congress_trades.export',
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m congress_trades', description="Load and maintain House PTR stock trades.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    backfill = commands.add_parser('backfill', help="load every House PTR filing from 2014 to 2024")
+    backfill.add_argument('--resume', action='store_true',
+                          help="skip completed years and filings already loaded; retry failed filings")
+    backfill.add_argument('--dead-letters', action='store_true',
+                          help="list the filings whose last attempt failed and exit")
+    backfill.add_argument('--first-year', type=int, default=2014, help="first year to load")
+    backfill.add_argument('--last-year', type=int, default=2024, help="last year to load")
+
+    enqueue = commands.add_parser('enqueue', help="queue every filing of the years not yet complete for backfill workers")
+    enqueue.add_argument('--first-year', type=int, default=2014, help="first year to queue")
+    enqueue.add_argument('--last-year', type=int, default=2024, help="last year to queue")
+    enqueue.add_argument('--status', action='store_true', help="print the number of tasks in each state and exit")
+
+    work = commands.add_parser('work', help="claim queued filings and load them until the queue is drained")
+    work.add_argument('--batch-size', type=int, default=config.QUEUE_BATCH_SIZE, help="filings claimed at once")
+    work.add_argument('--lease', type=int, default=config.QUEUE_LEASE_SECONDS,
+                      help="seconds before another worker may take over an unfinished claim")
+    work.add_argument('--max-attempts', type=int, default=config.QUEUE_MAX_ATTEMPTS,
+                      help="claims per filing before it is given up as failed")
+    work.add_argument('--follow', action='store_true', help="keep waiting for new tasks once the queue is drained")
+
+    update = commands.add_parser('update', help="load this year's new and failed filings")
+    update.add_argument('--year', type=int, help="index year to check (default: the current year)")
+
+    watch = commands.add_parser('watch', help="poll this year's FD index and load new filings as they appear")
+    watch.add_argument('--interval', type=float, default=config.WATCH_INTERVAL, help="seconds between index polls")
+    watch.add_argument('--once', action='store_true', help="poll once and exit")
+
+    commands.add_parser('update-prices', help="backfill future prices whose horizon has passed")
+
+    export = commands.add_parser('export', help="export changed years to year-partitioned Parquet")
+    export.add_argument('--output', default=config.EXPORT_DIR, help="snapshot directory")
+    return parser
+
+
+# Run one subcommand, e.g. main(['update']); returns the process exit status, 1 when the job
+# reported a failure it carried on from (see metrics.error) and 0 otherwise
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    command = importlib.import_module(COMMANDS[args.command])
+    metrics.start()
+    errors = metrics.errors()
+    try:
+        if args.command == 'backfill':
+            if args.dead_letters:
+                command.print_dead_letters()
+            else:
+                command.run(args.resume, args.first_year, args.last_year)
+        elif args.command == 'enqueue':
+            if args.status:
+                command.print_status()
+            else:
+                command.enqueue(args.first_year, args.last_year)
+        elif args.command == 'work':
+            command.work(args.batch_size, args.lease, args.max_attempts, args.follow)
+        elif args.command == 'update':
+            command.run(args.year)
+        elif args.command == 'watch':
+            command.run(args.interval, args.once)
+        elif args.command == 'export':
+            command.run(args.output)
+        else:
+            command.run()
+    finally:
+        db.close_pool()
+        metrics.flush(args.command)
+    return 1 if metrics.errors() > errors else 0
@@ -0,0 +1,81 @@
+import os
+
+# Root directory for the local caches (prices, ticker metadata, PDFs)
+CACHE_DIR = os.environ.get(
+    'CONGRESS_TRADES_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'congress_trades')
+)
+
+# On-disk daily close store, one memory-mappable file per ticker
+PRICE_STORE_DIR = os.path.join(CACHE_DIR, 'prices')
+
+# Price downloads: tickers per multi-ticker request and requests in flight at once
+PRICE_BATCH_TICKERS = int(os.environ.get('CONGRESS_TRADES_PRICE_BATCH_TICKERS', '50'))
+PRICE_FETCH_WORKERS = int(os.environ.get('CONGRESS_TRADES_PRICE_FETCH_WORKERS', '4'))
+
+# Ticker,Date,Close CSV that replaces yfinance as the price source, e.g. for offline runs
+PRICE_FILE = os.environ.get('CONGRESS_TRADES_PRICE_FILE', '')
+
+# Days after the trade at which a closing price is looked up (0 is the trade date itself),
+# e.g. CONGRESS_TRADES_PRICE_HORIZONS="0,7,30,50,100,365"
+PRICE_HORIZONS = tuple(
+    int(days) for days in os.environ.get('CONGRESS_TRADES_PRICE_HORIZONS', '0,50,100').split(',')
+)
+
+# Days after a trade's last horizon (plus the lookahead) before update-prices gives up on prices the
+# price store has no close for, e.g. delisted or unknown tickers
+PRICE_GIVE_UP_DAYS = int(os.environ.get('CONGRESS_TRADES_PRICE_GIVE_UP_DAYS', '30'))
+
+# Ticker industry/sector cache and how long its entries stay fresh
+METADATA_CACHE_PATH = os.path.join(CACHE_DIR, 'ticker_metadata.sqlite3')
+METADATA_TTL_DAYS = float(os.environ.get('CONGRESS_TRADES_METADATA_TTL_DAYS', '30'))
+
+# House Clerk financial disclosure site; point at a local stand-in server for testing
+CLERK_BASE_URL = os.environ.get('CONGRESS_TRADES_CLERK_URL', 'https://disclosures-clerk.house.gov').rstrip('/')
+
+# PTR PDF downloads: parallel connections and sustained requests per second
+FETCH_CONCURRENCY = int(os.environ.get('CONGRESS_TRADES_FETCH_CONCURRENCY', '8'))
+FETCH_RATE = float(os.environ.get('CONGRESS_TRADES_FETCH_RATE', '10'))
+
+# Seconds between FD index polls of the filing watcher
+WATCH_INTERVAL = float(os.environ.get('CONGRESS_TRADES_WATCH_INTERVAL', '60'))
+
+# Worker processes used to extract and parse PTR PDFs
+PARSE_WORKERS = int(os.environ.get('CONGRESS_TRADES_PARSE_WORKERS', str(os.cpu_count() or 1)))
+
+# How PTR PDFs are parsed: 'text' runs the regex parser over the flat page text, 'layout' reads
+# the transactions table by word position and stops at the end of the table
+PTR_EXTRACTION = os.environ.get('CONGRESS_TRADES_PTR_EXTRACTION', 'text')
+
+# Content-addressed cache of raw PTR PDFs and their extracted text, bounded in size
+DOC_CACHE_DIR = os.path.join(CACHE_DIR, 'documents')
+DOC_CACHE_MAX_MB = float(os.environ.get('CONGRESS_TRADES_DOC_CACHE_MB', '4096'))
+
+# Streaming backfill: rows per enrich/clean/load chunk and items buffered between stages
+CHUNK_ROWS = int(os.environ.get('CONGRESS_TRADES_CHUNK_ROWS', '500'))
+QUEUE_SIZE = int(os.environ.get('CONGRESS_TRADES_QUEUE_SIZE', '64'))
+
+# Distributed backfill: filings a worker claims at once, seconds before an unfinished claim can be
+# taken over by another worker, and claims per filing before it is given up as failed
+QUEUE_BATCH_SIZE = int(os.environ.get('CONGRESS_TRADES_QUEUE_BATCH_SIZE', '32'))
+QUEUE_LEASE_SECONDS = int(os.environ.get('CONGRESS_TRADES_QUEUE_LEASE_SECONDS', '600'))
+QUEUE_MAX_ATTEMPTS = int(os.environ.get('CONGRESS_TRADES_QUEUE_MAX_ATTEMPTS', '3'))
+
+# PostgreSQL connection string; when empty, libpq's PGHOST/PGUSER/PGPASSWORD/PGDATABASE/PGPORT,
+# ~/.pgpass and PGSERVICE are used instead
+DATABASE_DSN = os.environ.get('CONGRESS_TRADES_DSN', '')
+
+# Most connections a single run holds open at once
+DB_POOL_SIZE = int(os.environ.get('CONGRESS_TRADES_DB_POOL_SIZE', '4'))
+
+# Run metrics: JSON-lines event log ('-' for stderr), Prometheus textfile written at the end of
+# each run, and localhost port of a live /metrics endpoint (0 disables it)
+METRICS_LOG = os.environ.get('CONGRESS_TRADES_METRICS_LOG', '')
+METRICS_TEXTFILE = os.environ.get('CONGRESS_TRADES_METRICS_TEXTFILE', '')
+METRICS_PORT = int(os.environ.get('CONGRESS_TRADES_METRICS_PORT', '0'))
+
+# Year-partitioned Parquet snapshot of congress_stock_trades for offline analysis
+EXPORT_DIR = os.environ.get(
+    'CONGRESS_TRADES_EXPORT_DIR',
+    os.path.join(os.path.expanduser('~'), '.local', 'share', 'congress_trades', 'parquet')
+)
@@ -0,0 +1,56 @@
+import threading
+from contextlib import contextmanager
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import ThreadedConnectionPool
+
+from congress_trades import config
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+# Process-wide connection pool, opened on first use. Connections are handed out through a
+# semaphore, so callers wait for a free connection instead of failing when all are in use.
+def get_pool():
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(1, config.DB_POOL_SIZE, config.DATABASE_DSN)
+            _slots = threading.BoundedSemaphore(config.DB_POOL_SIZE)
+    return _pool
+
+
+# Borrow a pooled connection; the caller commits or rolls back
+@contextmanager
+def connection():
+    pool = get_pool()
+    with _slots:
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            if not conn.closed and conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            pool.putconn(conn)
+
+
+# Borrow a pooled connection for one transaction: committed if the block succeeds, rolled back otherwise
+@contextmanager
+def transaction():
+    with connection() as conn:
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
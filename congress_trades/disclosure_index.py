@@ -0,0 +1,113 @@
+import csv
+import hashlib
+import io
+import tempfile
+import zipfile
+
+import requests
+
+from congress_trades import metrics
+from congress_trades.fetch import disclosure_index_url, get_with_retry, make_session
+
+# Index archives up to this size are spooled in memory, larger ones overflow to a temporary file
+SPOOL_BYTES = 16 * 1024 * 1024
+
+# Bytes read from the response per chunk
+CHUNK_BYTES = 64 * 1024
+
+# Returned by IndexPoller.poll when the index could not be retrieved or read, as opposed to None
+# for an index that is unchanged since the last poll
+INDEX_FAILED = object()
+
+
+# Rows of the tab-separated .txt inside an FD index archive. The member is decompressed and
+# decoded as the rows are read, never held whole in memory.
+def _read_rows(archive):
+    with zipfile.ZipFile(archive) as zip_file:
+        for file_name in zip_file.namelist():
+            if file_name.endswith('.txt'):
+                with zip_file.open(file_name) as file:
+                    text = io.TextIOWrapper(file, encoding='utf-8-sig', errors='replace', newline='')
+                    return list(csv.DictReader(text, delimiter='\t'))
+    print("The file does not contain a .txt index.")
+    return None
+
+
+# Polls the FD index of a year with conditional requests. The ETag and Last-Modified of the
+# last copy read are sent back, so an unchanged index costs one bodiless 304. Servers that
+# send neither are caught by the SHA-256 of the archive, which skips re-reading an identical copy.
+class IndexPoller:
+    def __init__(self, session=None):
+        self.session = session or make_session(1)
+        self.validators = {}
+
+    # Rows of the year's index, None when it is unchanged since the last poll, or INDEX_FAILED when
+    # it cannot be retrieved or read. The validators of a copy that could not be read are not
+    # kept, so the next poll reads the index again.
+    def poll(self, year):
+        etag, last_modified, digest = self.validators.get(year, (None, None, None))
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        try:
+            response = get_with_retry(self.session, disclosure_index_url(year), retries=2, headers=headers, stream=True)
+            with response, tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as archive:
+                if response.status_code == 304:
+                    metrics.inc('index_polls_total', result='not_modified')
+                    return None
+                sha256 = hashlib.sha256()
+                for chunk in response.iter_content(CHUNK_BYTES):
+                    archive.write(chunk)
+                    sha256.update(chunk)
+                    metrics.inc('bytes_downloaded_total', len(chunk))
+                validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'), sha256.hexdigest())
+                if sha256.hexdigest() == digest:
+                    self.validators[year] = validators
+                    metrics.inc('index_polls_total', result='unchanged')
+                    return None
+                archive.seek(0)
+                rows = _read_rows(archive)
+                if rows is None:
+                    metrics.inc('index_polls_total', result='failed')
+                    return INDEX_FAILED
+                self.validators[year] = validators
+                metrics.inc('index_polls_total', result='changed')
+                return rows
+        except requests.HTTPError as e:
+            print(f"Failed to download file, status code: {e.response.status_code}")
+        except zipfile.BadZipFile:
+            print("The file is not a valid zip file.")
+        except Exception as e:
+            print(f"An error occurred: {e}")
+        metrics.inc('index_polls_total', result='failed')
+        return INDEX_FAILED
+
+    # Drop a year's validators so the next poll reads its index again, e.g. after it could not be processed
+    def forget(self, year):
+        self.validators.pop(year, None)
+
+    def close(self):
+        self.session.close()
+
+
+# Download a year's financial disclosure index and return the rows of its tab-separated .txt
+# as dicts, or None when it cannot be retrieved
+def download_index(year):
+    poller = IndexPoller()
+    try:
+        rows = poller.poll(year)
+        return None if rows is INDEX_FAILED else rows
+    finally:
+        poller.close()
+
+
+# (Year, DocID) of the periodic transaction reports in an index: document IDs that start with '2'
+def ptr_document_ids(rows):
+    doc_ids = []
+    for row in rows:
+        doc_id = (row.get('DocID') or '').strip()
+        if doc_id.startswith('2'):
+            doc_ids.append((int(row['Year']), doc_id))
+    return doc_ids
@@ -0,0 +1,92 @@
+import os
+import socket
+import time
+
+from congress_trades import config, db, metrics, work_queue
+from congress_trades.backfill import FIRST_YEAR, LAST_YEAR, checkpoint_years
+from congress_trades.disclosure_index import download_index, ptr_document_ids
+from congress_trades.ledger import completed_years
+
+# Seconds an idle worker waits before looking for claimable tasks again
+IDLE_SECONDS = 5
+
+
+# Coordinator: queue every PTR filing of the years not yet complete. Run it once; workers on any
+# host then drain the queue. Returns the number of filings queued.
+def enqueue(first_year=FIRST_YEAR, last_year=LAST_YEAR):
+    with db.connection() as conn:
+        done = completed_years(conn)
+    queued = 0
+    for year in range(first_year, last_year + 1):
+        if year in done:
+            print(f"Year {year} is already complete.")
+            continue
+        with metrics.timer('stage_seconds', stage='index'):
+            rows = download_index(year)
+        if rows is None:
+            print(f"Failed to retrieve document IDs for year {year}.")
+            metrics.error('index', year=year)
+            continue
+        with db.transaction() as conn:
+            added = work_queue.enqueue(conn, ptr_document_ids(rows))
+        print(f"Queued {added} filings for {year}.")
+        queued += added
+    print_status()
+    return queued
+
+
+# Print the number of tasks in each state
+def print_status():
+    with db.connection() as conn:
+        status = work_queue.queue_status(conn)
+    print(', '.join(f"{count} {state}" for state, count in sorted(status.items())) or "The queue is empty.")
+
+
+# Worker: claim batches of filings and run them through fetch, parse, enrich and load until no task
+# is open. Each filing's rows, ledger entry and task are committed together, and the worker's other
+# leases are renewed in the same transaction, so a slow batch keeps its claim as long as filings
+# keep finishing. A worker that dies only loses its lease, so its filings are taken over once the
+# lease expires. Start as many workers
+# as the database and the clerk site's rate limit allow, on one host or several. With follow, the
+# worker keeps waiting for new tasks instead of exiting when the queue is drained.
+def work(batch_size=config.QUEUE_BATCH_SIZE, lease_seconds=config.QUEUE_LEASE_SECONDS,
+         max_attempts=config.QUEUE_MAX_ATTEMPTS, follow=False):
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+
+    def finish(conn, document, error):
+        if not work_queue.finish(conn, document.Year, document.DocID, worker, error, max_attempts):
+            print(f"Lease on {document.DocID} was taken over by another worker.")
+        work_queue.renew(conn, worker, lease_seconds)
+
+    loader = None
+    loaded = 0
+    try:
+        while True:
+            with db.transaction() as conn:
+                tasks = work_queue.claim(conn, worker, batch_size, lease_seconds, max_attempts)
+                remaining = work_queue.open_tasks(conn) if not tasks else len(tasks)
+            if not tasks:
+                if not remaining and not follow:
+                    break
+                time.sleep(IDLE_SECONDS)
+                continue
+            print(f"{worker} claimed {len(tasks)} filings.")
+            metrics.inc('queue_tasks_claimed_total', len(tasks))
+            if loader is None:
+                from congress_trades.filing_loader import FilingLoader
+                loader = FilingLoader(finish=finish)
+            loaded += loader.load(tasks)
+    except KeyboardInterrupt:
+        print("Stopped; claimed filings are taken over once their lease expires.")
+    finally:
+        if loader is not None:
+            loader.close()
+
+    if loaded:
+        from congress_trades.analytics import update_analytics
+        update_analytics()
+    with db.connection() as conn:
+        finished = work_queue.finished_years(conn)
+    checkpoint_years(finished)
+    print(f"Inserted {loaded} rows.")
+    return loaded
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from congress_trades import config, metrics
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# Content-addressed store of raw PTR PDFs and their extracted text keyed by (Year, DocID).
+# Blobs live under objects/ named by their SHA-256 and are re-hashed on every read; a blob
+# that no longer matches its name is dropped and treated as a miss. When the total size
+# goes over max_mb the least recently read blobs are evicted.
+class DocumentCache:
+    def __init__(self, root=config.DOC_CACHE_DIR, max_mb=config.DOC_CACHE_MAX_MB):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, 'index.sqlite3'), check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                year INTEGER NOT NULL,
+                doc_id TEXT NOT NULL,
+                pdf_hash TEXT,
+                text_hash TEXT,
+                PRIMARY KEY (year, doc_id)
+            );
+            CREATE TABLE IF NOT EXISTS objects (
+                hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS objects_last_access ON objects (last_access);
+        """)
+        self._conn.commit()
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def _read_object(self, digest):
+        try:
+            with open(self._object_path(digest), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = None
+        with self._lock, self._conn:
+            if data is None or content_hash(data) != digest:
+                self._delete_object(digest)
+                return None
+            self._conn.execute("UPDATE objects SET last_access = ? WHERE hash = ?", (time.time(), digest))
+        return data
+
+    def _write_object(self, data):
+        digest = content_hash(data)
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO objects (hash, size, last_access) VALUES (?, ?, ?)",
+            (digest, len(data), time.time())
+        )
+        return digest
+
+    # Caller holds the lock
+    def _delete_object(self, digest):
+        try:
+            os.remove(self._object_path(digest))
+        except FileNotFoundError:
+            pass
+        self._conn.execute("DELETE FROM objects WHERE hash = ?", (digest,))
+        self._conn.execute("UPDATE documents SET pdf_hash = NULL WHERE pdf_hash = ?", (digest,))
+        self._conn.execute("UPDATE documents SET text_hash = NULL WHERE text_hash = ?", (digest,))
+
+    # Caller holds the lock
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for digest, size in self._conn.execute("SELECT hash, size FROM objects ORDER BY last_access").fetchall():
+            self._delete_object(digest)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _get(self, year, doc_id, column):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {column} FROM documents WHERE year = ? AND doc_id = ?", (int(year), str(doc_id))
+            ).fetchone()
+        data = self._read_object(row[0]) if row is not None and row[0] is not None else None
+        metrics.inc('cache_requests_total', cache=column[:-len('_hash')], result='miss' if data is None else 'hit')
+        return data
+
+    def _put(self, year, doc_id, column, data):
+        with self._lock, self._conn:
+            digest = self._write_object(data)
+            self._conn.execute(
+                f"INSERT INTO documents (year, doc_id, {column}) VALUES (?, ?, ?) "
+                f"ON CONFLICT (year, doc_id) DO UPDATE SET {column} = excluded.{column}",
+                (int(year), str(doc_id), digest)
+            )
+            self._evict()
+        return digest
+
+    def get_pdf(self, year, doc_id):
+        return self._get(year, doc_id, 'pdf_hash')
+
+    def put_pdf(self, year, doc_id, content):
+        return self._put(year, doc_id, 'pdf_hash', content)
+
+    def get_text(self, year, doc_id):
+        data = self._get(year, doc_id, 'text_hash')
+        return data.decode('utf-8') if data is not None else None
+
+    def put_text(self, year, doc_id, text):
+        return self._put(year, doc_id, 'text_hash', text.encode('utf-8'))
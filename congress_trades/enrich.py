@@ -0,0 +1,15 @@
+from congress_trades.config import PRICE_HORIZONS
+from congress_trades.loader import COLUMN_HORIZONS
+from congress_trades.price_lookup import lookup_prices
+
+
+# Merge stock data with the main DataFrame: closes at each horizon from the price store and
+# industry/sector from the metadata cache. The horizons congress_stock_trades has columns for
+# are always included, whatever horizons are configured.
+def merge_stock_data(df, price_store, metadata_cache, horizons=PRICE_HORIZONS):
+    horizons = sorted(set(horizons) | set(COLUMN_HORIZONS))
+    df = df.join(lookup_prices(df, price_store, horizons))
+    info = metadata_cache.get_many(df['Ticker'].dropna().unique())
+    df['Industry'] = df['Ticker'].map(lambda ticker: info.get(ticker, (None, None))[0])
+    df['Sector'] = df['Ticker'].map(lambda ticker: info.get(ticker, (None, None))[1])
+    return df
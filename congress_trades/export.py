@@ -0,0 +1,193 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import psycopg2
+
+from congress_trades import config, db, metrics
+
+# Columns written to each Year=YYYY/ partition; Year itself is encoded in the directory name
+EXPORT_SCHEMA = pa.schema([
+    ('record_id', pa.int64()),
+    ('ID', pa.int64()),
+    ('Line_Number', pa.int16()),
+    ('Representative', pa.string()),
+    ('District', pa.string()),
+    ('Transaction_Type', pa.string()),
+    ('Ticker', pa.string()),
+    ('Date', pa.date32()),
+    ('Notification_Date', pa.date32()),
+    ('Amount', pa.float64()),
+    ('Average_Price', pa.float64()),
+    ('Price_in_50_Days', pa.float64()),
+    ('Price_in_100_Days', pa.float64()),
+    ('Industry', pa.string()),
+    ('Sector', pa.string()),
+])
+
+# Rows per Parquet row group; rows are sorted by Ticker and Date so each group's statistics
+# let ticker and date filters skip most of a year
+ROW_GROUP_SIZE = 16384
+
+MANIFEST = '_manifest.json'
+
+# Hidden directory holding every written version of each partition; Year=YYYY is a symbolic link
+# to the current one, so replacing a year is a single rename of the link
+VERSIONS_DIR = '.partitions'
+
+
+def _partition_dir(root, year):
+    return os.path.join(root, f'Year={int(year)}')
+
+
+# Remove a year's partition link, or a partition directory written before partitions were links
+def _remove_partition(path):
+    if os.path.islink(path):
+        os.remove(path)
+    else:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# Delete partition versions no Year=YYYY link points to: replaced versions, and versions left
+# behind by an interrupted export
+def _prune_versions(root):
+    versions = os.path.join(root, VERSIONS_DIR)
+    current = {os.path.basename(os.readlink(os.path.join(root, name)))
+               for name in os.listdir(root) if os.path.islink(os.path.join(root, name))}
+    for name in os.listdir(versions):
+        if name not in current:
+            shutil.rmtree(os.path.join(versions, name), ignore_errors=True)
+
+
+def _load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(root, manifest):
+    tmp_path = os.path.join(root, MANIFEST + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, os.path.join(root, MANIFEST))
+
+
+# Stream one year out of PostgreSQL with COPY and return it as an Arrow table
+def _read_year(conn, year, spool_dir):
+    columns = ', '.join(f'{field.name}::FLOAT8' if pa.types.is_floating(field.type) else field.name
+                        for field in EXPORT_SCHEMA)
+    with tempfile.TemporaryFile(dir=spool_dir) as spool:
+        with conn.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY (SELECT {columns} FROM congress_stock_trades WHERE Year = {int(year)} "
+                f"ORDER BY Ticker, Date, ID, Line_Number) TO STDOUT WITH (FORMAT csv)",
+                spool
+            )
+        if not spool.tell():
+            return EXPORT_SCHEMA.empty_table()
+        spool.seek(0)
+        return pa_csv.read_csv(
+            spool,
+            read_options=pa_csv.ReadOptions(column_names=EXPORT_SCHEMA.names),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=EXPORT_SCHEMA, strings_can_be_null=True, quoted_strings_can_be_null=False
+            ),
+        )
+
+
+# Replace one year's partition atomically: write the new version under VERSIONS_DIR, then point
+# the Year=YYYY link at it with one rename. Readers see either the old or the new year, never
+# neither; files of the old version stay readable by readers that already opened them.
+def _write_partition(root, year, table):
+    target = _partition_dir(root, year)
+    version = tempfile.mkdtemp(prefix=f'Year={int(year)}.', dir=os.path.join(root, VERSIONS_DIR))
+    pq.write_table(table, os.path.join(version, 'part-0.parquet'), row_group_size=ROW_GROUP_SIZE, compression='zstd')
+    link = os.path.join(root, f'.Year={int(year)}.link')
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.join(VERSIONS_DIR, os.path.basename(version)), link)
+    if os.path.exists(target) and not os.path.islink(target):
+        # A directory from before partitions were links is swapped out once, non-atomically
+        _remove_partition(target)
+    os.replace(link, target)
+
+
+# Write every year changed since the last export (all years the first time) to
+# root/Year=YYYY/part-0.parquet. Unchanged years are left alone, and years whose trades were
+# all deleted are removed. A year is only marked exported at the version that was written,
+# so changes made during the export are picked up by the next one. Returns the years written;
+# the caller commits.
+def export_trades(conn, root=config.EXPORT_DIR):
+    os.makedirs(os.path.join(root, VERSIONS_DIR), exist_ok=True)
+    manifest = _load_manifest(root)
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT Year, Version FROM congress_export_dirty_years ORDER BY Year")
+        dirty = cursor.fetchall()
+
+    written = []
+    for year, version in dirty:
+        with metrics.timer('export_partition_seconds'):
+            table = _read_year(conn, year, root)
+            if table.num_rows:
+                _write_partition(root, year, table)
+                manifest[str(year)] = {'rows': table.num_rows, 'exported_at': datetime.now().isoformat(timespec='seconds')}
+            else:
+                _remove_partition(_partition_dir(root, year))
+                manifest.pop(str(year), None)
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM congress_export_dirty_years WHERE Year = %s AND Version = %s", (year, version))
+        metrics.inc('export_rows_total', table.num_rows)
+        written.append(year)
+        _save_manifest(root, manifest)
+    _prune_versions(root)
+    return written
+
+
+# Export every changed year to output and commit, so the next run only sees later changes
+def run(output=config.EXPORT_DIR):
+    try:
+        with db.transaction() as conn:
+            years = export_trades(conn, output)
+        print(f"Exported {len(years)} changed years to {output}: {years}")
+        return len(years)
+    except psycopg2.Error as err:
+        print(f"Error exporting trades: {err}")
+        metrics.error('export', error=str(err))
+        return 0
+
+
+# Open the exported snapshot as a dataset. Files are memory-mapped, and Year is a partition
+# column, so filters on it skip whole directories. pyarrow.dataset pulls in pandas, so it is
+# only imported by readers, not by the export.
+def open_trades(root=config.EXPORT_DIR):
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pa_fs
+    return ds.dataset(
+        root, format='parquet', partitioning='hive',
+        filesystem=pa_fs.LocalFileSystem(use_mmap=True),
+        exclude_invalid_files=True, ignore_prefixes=['.', '_'],
+    )
+
+
+# Read trades from the snapshot into a DataFrame without touching the database. Only the
+# requested columns are decoded, and the year range, tickers and filter are pushed down to
+# partition pruning and row-group statistics. filter is an optional pyarrow.dataset expression,
+# e.g. ds.field('Transaction_Type') == 'P'.
+def read_trades(root=config.EXPORT_DIR, columns=None, years=None, tickers=None, filter=None):
+    import pyarrow.dataset as ds
+    conditions = [] if filter is None else [filter]
+    if years is not None:
+        conditions.append(ds.field('Year').isin(list(years)))
+    if tickers is not None:
+        conditions.append(ds.field('Ticker').isin(list(tickers)))
+    predicate = None
+    for condition in conditions:
+        predicate = condition if predicate is None else predicate & condition
+    return open_trades(root).to_table(columns=columns, filter=predicate).to_pandas(date_as_object=False)
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from congress_trades import config, metrics
+
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+# Responses worth retrying: rate limiting and server-side failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def ptr_pdf_url(year, doc_id):
+    return f'{config.CLERK_BASE_URL}/public_disc/ptr-pdfs/{year}/{doc_id}.pdf'
+
+
+def disclosure_index_url(year):
+    return f'{config.CLERK_BASE_URL}/public_disc/financial-pdfs/{year}FD.zip'
+
+
+# Token bucket shared by all workers: allows bursts of `capacity` and `rate` requests per second on average
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Keep-alive session whose connection pool is large enough for every worker
+def make_session(pool_size=config.FETCH_CONCURRENCY):
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# GET a URL through the rate limiter, retrying 429/5xx responses and connection errors with exponential backoff.
+# A Retry-After header, when present, overrides the backoff delay. With stream, the body is left
+# unread for the caller to consume (and count) incrementally.
+def get_with_retry(session, url, bucket=None, retries=5, backoff=0.5, timeout=30, headers=None, stream=False):
+    for attempt in range(retries + 1):
+        if bucket is not None:
+            bucket.acquire()
+        delay = backoff * (2 ** attempt)
+        if attempt:
+            metrics.inc('http_retries_total')
+        try:
+            with metrics.timer('http_request_seconds'):
+                response = session.get(url, headers=headers, stream=stream, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            metrics.inc('http_requests_total', status='error')
+            if attempt == retries:
+                raise
+        else:
+            metrics.inc('http_requests_total', status=response.status_code)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                response.raise_for_status()
+                if not stream:
+                    metrics.inc('bytes_downloaded_total', len(response.content))
+                return response
+            response.close()
+            retry_after = response.headers.get('Retry-After')
+            if retry_after is not None and retry_after.isdigit():
+                delay = float(retry_after)
+        time.sleep(delay)
+
+
+# Concurrent PTR PDF downloader over a shared keep-alive session.
+# fetch_all yields (year, doc_id, content, error) in input order while keeping at most
+# a few requests per worker in flight, so memory stays bounded on large years.
+# With a DocumentCache, cached PDFs are served locally and downloads are added to it.
+class PdfFetcher:
+    def __init__(self, concurrency=config.FETCH_CONCURRENCY, rate=config.FETCH_RATE, retries=5, backoff=0.5, cache=None):
+        self.concurrency = concurrency
+        self.cache = cache
+        self.bucket = TokenBucket(rate) if rate else None
+        self.retries = retries
+        self.backoff = backoff
+        self.session = make_session(concurrency)
+
+    def fetch(self, year, doc_id):
+        if self.cache is not None:
+            content = self.cache.get_pdf(year, doc_id)
+            if content is not None:
+                return content
+        response = get_with_retry(self.session, ptr_pdf_url(year, doc_id), self.bucket, self.retries, self.backoff)
+        if self.cache is not None:
+            self.cache.put_pdf(year, doc_id, response.content)
+        return response.content
+
+    def _fetch_one(self, year, doc_id):
+        try:
+            return year, doc_id, self.fetch(year, doc_id), None
+        except Exception as e:
+            return year, doc_id, None, e
+
+    def fetch_all(self, doc_ids):
+        window = self.concurrency * 2
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for year, doc_id in doc_ids:
+                pending.append(pool.submit(self._fetch_one, year, doc_id))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def close(self):
+        self.session.close()
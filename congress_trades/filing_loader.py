@@ -0,0 +1,90 @@
+import psycopg2
+
+from congress_trades import db, metrics
+from congress_trades.doc_cache import DocumentCache
+from congress_trades.enrich import merge_stock_data
+from congress_trades.fetch import PdfFetcher
+from congress_trades.frames import clean_trades, records_to_frame
+from congress_trades.ledger import FAILED, LOADED, record_document
+from congress_trades.loader import delete_stale_lines, upsert_trades
+from congress_trades.metadata_cache import MetadataCache
+from congress_trades.parse_pool import ParsePool
+from congress_trades.price_store import PriceStore
+
+
+# Load one filing's rows and record it in the ledger in a single transaction.
+# Stored lines the filing no longer has are deleted, and filings whose rows are all filtered
+# out are recorded too, so they are not processed again. Database errors are raised so the
+# caller can record the filing as failed.
+def insert_data_to_postgres(df, document, finish=None):
+    with db.transaction() as conn:
+        rows = upsert_trades(conn, df)
+        delete_stale_lines(conn, document.Year, document.DocID, df['Line_Number'].tolist())
+        record_document(conn, document.Year, document.DocID, LOADED, len(df), document.Content_Hash)
+        if finish is not None:
+            finish(conn, document, None)
+    print(f"Successfully inserted or updated {rows} rows.")
+
+
+# Record a filing that could not be processed; it is retried by the next run
+def record_failure(document, error, finish=None):
+    try:
+        with db.transaction() as conn:
+            record_document(conn, document.Year, document.DocID, FAILED, 0, document.Content_Hash, str(error))
+            if finish is not None:
+                finish(conn, document, error)
+    except psycopg2.Error as err:
+        print(f"Error: {err}")
+        metrics.error('ledger', error=str(err))
+
+
+# Fetches, parses, enriches and loads filings one at a time, each committed together with its
+# ledger entry as soon as it is parsed. The stores, fetcher and parse pool stay open between
+# calls, so a long-running watcher starts them once instead of on every new filing. finish, when
+# given, is called as finish(conn, document, error) in the transaction that records each filing,
+# so a work queue task is closed together with the filing's rows.
+class FilingLoader:
+    def __init__(self, finish=None):
+        self.finish = finish
+        self.price_store = PriceStore()
+        self.metadata_cache = MetadataCache()
+        document_cache = DocumentCache()
+        self.fetcher = PdfFetcher(cache=document_cache)
+        self.parse_pool = ParsePool(cache=document_cache)
+
+    # Load the given (Year, DocID) filings; returns the number of rows loaded
+    def load(self, doc_ids):
+        loaded = 0
+        for document in self.parse_pool.parse_all(self.fetcher.fetch_all(doc_ids)):
+            if document.error is not None:
+                metrics.log('document_failed', year=document.Year, doc_id=document.DocID, error=document.error)
+                print(f"Error processing {document.DocID}: {document.error}")
+                record_failure(document, document.error, self.finish)
+                continue
+            try:
+                df_data = records_to_frame(document.records)
+                with metrics.timer('stage_seconds', stage='enrich'):
+                    df_data = merge_stock_data(df_data, self.price_store, self.metadata_cache)
+                with metrics.timer('stage_seconds', stage='clean'):
+                    df_data = clean_trades(df_data)
+                with metrics.timer('stage_seconds', stage='load'):
+                    insert_data_to_postgres(df_data, document, self.finish)
+                metrics.inc('rows_loaded_total', len(df_data))
+                loaded += len(df_data)
+            except Exception as e:
+                metrics.log('document_failed', year=document.Year, doc_id=document.DocID, error=str(e))
+                metrics.error('load', year=document.Year, doc_id=document.DocID, error=str(e))
+                print(f"Error processing {document.DocID}: {e}")
+                record_failure(document, e, self.finish)
+                continue
+        return loaded
+
+    def close(self):
+        self.parse_pool.close()
+        self.fetcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from congress_trades.ptr import EXCLUDED_TICKERS, MAX_TICKER_LENGTH, TRANSACTION_COLUMNS
+
+# Text columns with few distinct values, stored as categoricals
+CATEGORY_COLUMNS = ['Representative', 'District', 'Transaction_Type', 'Ticker']
+
+# Categorical columns normalized to upper case
+UPPER_COLUMNS = ['Transaction_Type', 'Ticker']
+
+
+# Categorical of a text column; with upper, only the distinct values are upper-cased
+def _category(values, upper=False):
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    uniques = pd.Index(uniques, dtype=object)
+    if upper:
+        upper_codes, uniques = pd.factorize(uniques.str.upper())
+        codes = np.append(upper_codes, -1)[codes]
+    return pd.Categorical.from_codes(codes, uniques)
+
+
+# datetime64 column of 'MM/DD/YYYY' strings; each distinct date is parsed once, bad dates become NaT
+def _dates(values):
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format='%m/%d/%Y', errors='coerce')
+    return np.append(parsed.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT', 'ns'))[codes]
+
+
+# Typed DataFrame of Transaction records: dates parsed once to datetime64, text columns as
+# categoricals with Ticker and Transaction_Type upper-cased, Amount as float
+def records_to_frame(records):
+    columns = dict(zip(TRANSACTION_COLUMNS, zip(*records))) if records else {}
+    data = {}
+    for column in TRANSACTION_COLUMNS:
+        values = columns.get(column, ())
+        if column in CATEGORY_COLUMNS:
+            data[column] = _category(values, column in UPPER_COLUMNS)
+        elif column in ('Date', 'Notification_Date'):
+            data[column] = _dates(values)
+        elif column in ('Year', 'Line_Number'):
+            data[column] = np.asarray(values, dtype='int16')
+        elif column == 'Amount':
+            data[column] = np.asarray(values, dtype='float64')
+        else:
+            data[column] = pd.Series(values, dtype=object).astype(str)
+    return pd.DataFrame(data, columns=TRANSACTION_COLUMNS)
+
+
+# Rows of a categorical column whose category passes a test evaluated once per category
+def _category_mask(values, keep):
+    codes = values.cat.codes.to_numpy()
+    return (codes >= 0) & keep[np.maximum(codes, 0)]
+
+
+# Drop rows that cannot be stored or analysed, in a single vectorized pass: no trade date or
+# amount, neither a price nor a sector, a non-ticker in the ticker column, or a transaction
+# type that is not a single letter
+def clean_trades(df):
+    tickers = df['Ticker'].cat.categories
+    transaction_types = df['Transaction_Type'].cat.categories
+    mask = (
+        df['Date'].notna().to_numpy()
+        & df['Amount'].notna().to_numpy()
+        & (df['Average_Price'].notna() | df['Sector'].notna()).to_numpy()
+        & _category_mask(df['Ticker'], ~tickers.isin(EXCLUDED_TICKERS) & np.asarray(tickers.str.len() <= MAX_TICKER_LENGTH))
+        & _category_mask(df['Transaction_Type'], np.asarray(transaction_types.str.len() == 1))
+    )
+    return df[mask]
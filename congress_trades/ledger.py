@@ -0,0 +1,77 @@
+import io
+
+LOADED = 'loaded'
+FAILED = 'failed'
+
+
+# (Year, DocID) pairs from the FD index that still need work: never processed, or failed last time.
+# The index is staged in a temporary table and diffed against the ledger with a server-side anti-join.
+def find_new_documents(conn, doc_ids):
+    buffer = io.StringIO()
+    for year, doc_id in doc_ids:
+        if str(doc_id).isdigit():
+            buffer.write(f"{int(year)}\t{int(doc_id)}\n")
+    buffer.seek(0)
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS fd_index (Year INT NOT NULL, DocID BIGINT NOT NULL) ON COMMIT DROP
+        """)
+        cursor.execute("TRUNCATE fd_index")
+        cursor.copy_expert("COPY fd_index (Year, DocID) FROM STDIN", buffer)
+        cursor.execute("""
+        SELECT DISTINCT i.Year, i.DocID
+        FROM fd_index i
+        WHERE NOT EXISTS (
+            SELECT 1 FROM congress_ingestion_ledger l
+            WHERE l.Year = i.Year AND l.DocID = i.DocID AND l.Status <> %s
+        )
+        ORDER BY i.Year, i.DocID
+        """, (FAILED,))
+        return [(year, str(doc_id)) for year, doc_id in cursor.fetchall()]
+
+
+# Record the outcome of processing one filing; call in the same transaction as its rows are loaded
+def record_document(conn, year, doc_id, status, row_count=0, content_hash=None, error=None):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        INSERT INTO congress_ingestion_ledger AS l (Year, DocID, Status, Content_Hash, Row_Count, Error)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (Year, DocID) DO UPDATE
+        SET Status = EXCLUDED.Status,
+            Content_Hash = COALESCE(EXCLUDED.Content_Hash, l.Content_Hash),
+            Row_Count = EXCLUDED.Row_Count,
+            Error = EXCLUDED.Error,
+            Attempts = l.Attempts + 1,
+            Updated_At = now()
+        """, (int(year), int(doc_id), status, content_hash, int(row_count), error))
+
+
+# Dead letters: filings whose last attempt failed
+def failed_documents(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        SELECT Year, DocID, Attempts, Error, Updated_At
+        FROM congress_ingestion_ledger
+        WHERE Status = %s
+        ORDER BY Year, DocID
+        """, (FAILED,))
+        return cursor.fetchall()
+
+
+# Years whose filings have all been loaded by an earlier run
+def completed_years(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT Year FROM congress_ingestion_years")
+        return {year for (year,) in cursor.fetchall()}
+
+
+# Mark a year complete once none of its filings is left to process
+def complete_year(conn, year, doc_ids):
+    if find_new_documents(conn, doc_ids):
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        INSERT INTO congress_ingestion_years (Year, Documents) VALUES (%s, %s)
+        ON CONFLICT (Year) DO UPDATE SET Documents = EXCLUDED.Documents, Completed_At = now()
+        """, (int(year), len(doc_ids)))
+    return True
@@ -0,0 +1,176 @@
+import io
+import re
+
+import pandas as pd
+
+from congress_trades import metrics
+
+# Columns persisted to congress_stock_trades; prices at other horizons go to congress_trade_prices
+TRADE_COLUMNS = ['Year', 'ID', 'Line_Number', 'Representative', 'District', 'Transaction_Type', 'Ticker', 'Date', 'Notification_Date',
+                 'Amount', 'Average_Price', 'Price_in_50_Days', 'Price_in_100_Days', 'Industry', 'Sector']
+
+DATE_COLUMNS = ['Date', 'Notification_Date']
+
+# Natural key of congress_stock_trades: one row per transaction line of a filing
+KEY_COLUMNS = ['Year', 'ID', 'Line_Number']
+
+# Price horizons with a column in congress_stock_trades, by days after the trade. Prices already
+# stored are kept when a reload has none, so reruns never undo the price backfill, unless the
+# line now holds a trade with another ticker or date.
+COLUMN_HORIZONS = {0: 'Average_Price', 50: 'Price_in_50_Days', 100: 'Price_in_100_Days'}
+PRICE_COLUMNS = list(COLUMN_HORIZONS.values())
+
+# Column of the close N days after the trade, as added by price_lookup
+HORIZON_COLUMN_RE = re.compile(r'Price_in_(\d+)_Days$')
+
+# Marker COPY reads as NULL
+COPY_NULL = '\\N'
+
+
+# ISO 'YYYY-MM-DD' strings for a column of datetimes or 'MM/DD/YYYY' strings; unparseable dates become NULL
+def _iso_dates(values):
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, format='%m/%d/%Y', errors='coerce')
+    return values.dt.strftime('%Y-%m-%d')
+
+
+# Encode the trade columns of df as COPY CSV: ISO dates, NaN/None as NULL, floats at full precision.
+# Price columns missing from df are written as NULL.
+def encode_copy_rows(df):
+    data = df.reindex(columns=TRADE_COLUMNS)
+    for column in DATE_COLUMNS:
+        data[column] = _iso_dates(data[column])
+    buffer = io.StringIO()
+    data.to_csv(buffer, header=False, index=False, na_rep=COPY_NULL)
+    buffer.seek(0)
+    return buffer
+
+
+# Stream df into a table with COPY FROM STDIN in a single round trip; the caller commits
+def copy_trades(conn, df, table='congress_stock_trades'):
+    if df.empty:
+        return 0
+    with conn.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(TRADE_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+            encode_copy_rows(df)
+        )
+        return cursor.rowcount
+
+
+# Columns the prices of a trade depend on; a stored price only carries over while they are unchanged
+PRICED_BY_COLUMNS = ['Ticker', 'Date']
+
+# Set by update-prices on trades it gave up pricing; cleared when a line now holds another trade
+GIVEN_UP_COLUMN = 'Prices_Given_Up'
+
+
+# SET and WHERE clauses of the upsert: only rows whose values actually changed are rewritten
+def _upsert_clauses():
+    updated = [column for column in TRADE_COLUMNS if column not in KEY_COLUMNS]
+    same_trade = (f"({', '.join(f't.{column}' for column in PRICED_BY_COLUMNS)}) IS NOT DISTINCT FROM "
+                  f"({', '.join(f'EXCLUDED.{column}' for column in PRICED_BY_COLUMNS)})")
+    assignments = ', '.join(
+        f"{column} = CASE WHEN {same_trade} THEN COALESCE(EXCLUDED.{column}, t.{column}) ELSE EXCLUDED.{column} END"
+        if column in PRICE_COLUMNS
+        else f"{column} = EXCLUDED.{column}"
+        for column in updated
+    ) + f", {GIVEN_UP_COLUMN} = CASE WHEN {same_trade} THEN t.{GIVEN_UP_COLUMN} END"
+    changed = (f"({', '.join(f't.{column}' for column in updated)}) IS DISTINCT FROM "
+               f"({', '.join(f'EXCLUDED.{column}' for column in updated)})")
+    return assignments, changed
+
+
+# COPY df into a temporary staging table, then upsert it into congress_stock_trades on the
+# natural key. Re-loading rows that are already stored unchanged writes nothing. Returns the
+# number of rows inserted or changed; the caller commits.
+def upsert_trades(conn, df):
+    if df.empty:
+        return 0
+    columns = ', '.join(TRADE_COLUMNS)
+    assignments, changed = _upsert_clauses()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS congress_stock_trades_staging ON COMMIT DROP AS "
+            f"SELECT {columns} FROM congress_stock_trades WITH NO DATA"
+        )
+        cursor.execute("TRUNCATE congress_stock_trades_staging")
+    with metrics.timer('db_copy_seconds'):
+        copy_trades(conn, df, table='congress_stock_trades_staging')
+    with conn.cursor() as cursor, metrics.timer('db_upsert_seconds'):
+        if extra_horizons(df.columns):
+            # Extra horizon prices of lines that now hold a different trade no longer apply
+            cursor.execute(f"""
+            DELETE FROM congress_trade_prices p
+            USING congress_stock_trades t, congress_stock_trades_staging s
+            WHERE p.Year = t.Year AND p.ID = t.ID AND p.Line_Number = t.Line_Number
+            AND s.Year = t.Year AND s.ID = t.ID AND s.Line_Number = t.Line_Number
+            AND ({', '.join(f't.{column}' for column in PRICED_BY_COLUMNS)}) IS DISTINCT FROM
+                ({', '.join(f's.{column}' for column in PRICED_BY_COLUMNS)})
+            """)
+        cursor.execute(f"""
+        INSERT INTO congress_stock_trades AS t ({columns})
+        SELECT DISTINCT ON ({', '.join(KEY_COLUMNS)}) {columns} FROM congress_stock_trades_staging
+        ON CONFLICT ({', '.join(KEY_COLUMNS)}) DO UPDATE SET {assignments}
+        WHERE {changed}
+        """)
+        rows = cursor.rowcount
+    upsert_horizon_prices(conn, df)
+    metrics.inc('rows_staged_total', len(df))
+    metrics.inc('rows_upserted_total', rows)
+    return rows
+
+
+# Delete the stored lines of a filing that are not among lines, the Line_Numbers it was just
+# loaded with, so a reload after a parser change leaves no orphaned rows. Their extra horizon
+# prices go with them. Returns the number of rows deleted; the caller commits.
+def delete_stale_lines(conn, year, doc_id, lines):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM congress_stock_trades WHERE Year = %s AND ID = %s AND NOT (Line_Number = ANY(%s::SMALLINT[]))",
+            (int(year), int(doc_id), [int(line) for line in lines])
+        )
+        rows = cursor.rowcount
+    metrics.inc('rows_deleted_total', rows)
+    return rows
+
+
+# Horizons of df's Price_in_N_Days columns that have no column in congress_stock_trades
+def extra_horizons(columns):
+    matches = (HORIZON_COLUMN_RE.match(str(column)) for column in columns)
+    return sorted(int(match.group(1)) for match in matches
+                  if match is not None and int(match.group(1)) not in COLUMN_HORIZONS)
+
+
+# Upsert the prices of df's extra horizons into congress_trade_prices, one row per trade and
+# horizon. Missing prices are skipped, so a reload never erases a price the backfill found.
+# Returns the number of prices inserted or changed; the caller commits.
+def upsert_horizon_prices(conn, df):
+    horizons = extra_horizons(df.columns)
+    if df.empty or not horizons:
+        return 0
+    keys = {column: df[column].to_numpy() for column in KEY_COLUMNS}
+    prices = pd.concat([
+        pd.DataFrame({**keys, 'Horizon_Days': days, 'Price': df[f'Price_in_{days}_Days'].to_numpy(dtype='float64')})
+        for days in horizons
+    ], ignore_index=True).dropna(subset=['Price'])
+    if prices.empty:
+        return 0
+    buffer = io.StringIO()
+    prices.to_csv(buffer, header=False, index=False)
+    buffer.seek(0)
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS congress_trade_prices_staging ON COMMIT DROP AS
+        SELECT Year, ID, Line_Number, Horizon_Days, Price FROM congress_trade_prices WITH NO DATA
+        """)
+        cursor.execute("TRUNCATE congress_trade_prices_staging")
+        cursor.copy_expert("COPY congress_trade_prices_staging FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute("""
+        INSERT INTO congress_trade_prices AS p (Year, ID, Line_Number, Horizon_Days, Price)
+        SELECT DISTINCT ON (Year, ID, Line_Number, Horizon_Days) Year, ID, Line_Number, Horizon_Days, Price
+        FROM congress_trade_prices_staging
+        ON CONFLICT (Year, ID, Line_Number, Horizon_Days) DO UPDATE SET Price = EXCLUDED.Price
+        WHERE p.Price IS DISTINCT FROM EXCLUDED.Price
+        """)
+        return cursor.rowcount
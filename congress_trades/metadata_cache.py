@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import yfinance as yf
+
+from congress_trades import config, metrics
+
+
+# Returned by _fetch_info when the lookup itself failed (rate limit, network error)
+_FAILED = object()
+
+
+# Industry and sector of a ticker from yfinance, None when the ticker is unknown or delisted, or
+# _FAILED when the lookup failed and says nothing about the ticker
+def _fetch_info(ticker):
+    metrics.inc('yfinance_requests_total', call='info')
+    try:
+        with metrics.timer('yfinance_seconds', call='info'):
+            info = yf.Ticker(ticker).info
+    except Exception as e:
+        metrics.inc('yfinance_errors_total', call='info')
+        metrics.log('yfinance_error', call='info', ticker=ticker, error=str(e))
+        print(f"Error retrieving info for {ticker}: {e}")
+        return _FAILED
+    industry, sector = info.get('industry'), info.get('sector')
+    if industry is None and sector is None:
+        return None
+    return industry, sector
+
+
+# Persistent (industry, sector) cache keyed by ticker.
+# Tickers yfinance knows nothing about are stored as negative entries so they are not
+# looked up again until their entry expires. Failed lookups are not stored: the ticker is
+# retried on the next warm-up, and an expired entry keeps being served until then.
+class MetadataCache:
+    def __init__(self, path=config.METADATA_CACHE_PATH, ttl_days=config.METADATA_TTL_DAYS, workers=8):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl_seconds = ttl_days * 86400
+        self.workers = workers
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ticker_metadata (
+                ticker TEXT PRIMARY KEY,
+                found INTEGER NOT NULL,
+                industry TEXT,
+                sector TEXT,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    # Stored entries of the given tickers; with fresh, only those that have not expired
+    def _entries(self, tickers, fresh=True):
+        cutoff = time.time() - self.ttl_seconds if fresh else 0
+        entries = {}
+        tickers = list(tickers)
+        for i in range(0, len(tickers), 500):
+            chunk = tickers[i:i + 500]
+            rows = self._conn.execute(
+                f"SELECT ticker, industry, sector FROM ticker_metadata "
+                f"WHERE fetched_at >= ? AND ticker IN ({','.join('?' * len(chunk))})",
+                [cutoff, *chunk]
+            )
+            for ticker, industry, sector in rows:
+                entries[ticker] = (industry, sector)
+        return entries
+
+    # Fetch every missing or expired ticker concurrently and store the results in one transaction
+    def warm(self, tickers):
+        tickers = set(tickers)
+        missing = sorted(tickers - self._entries(tickers).keys())
+        metrics.inc('cache_requests_total', len(tickers) - len(missing), cache='metadata', result='hit')
+        metrics.inc('cache_requests_total', len(missing), cache='metadata', result='miss')
+        if not missing:
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(_fetch_info, missing))
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ticker_metadata (ticker, found, industry, sector, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                [(ticker, info is not None, *(info or (None, None)), now)
+                 for ticker, info in zip(missing, results) if info is not _FAILED]
+            )
+
+    # Map each ticker to (industry, sector), warming the cache for any that are missing
+    def get_many(self, tickers):
+        tickers = set(tickers)
+        self.warm(tickers)
+        entries = self._entries(tickers, fresh=False)
+        return {ticker: entries.get(ticker, (None, None)) for ticker in tickers}
+
+    def get(self, ticker):
+        return self.get_many([ticker])[ticker]
@@ -0,0 +1,163 @@
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from congress_trades import config
+
+# Prefix of every exported metric name
+PREFIX = 'congress_trades_'
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_log_file = None
+_server = None
+
+
+def _key(name, labels):
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+# Add value to a counter, e.g. inc('http_requests_total', status=200)
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+# Record one latency in seconds in a histogram
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram['buckets'][i] += 1
+                break
+        histogram['sum'] += seconds
+        histogram['count'] += 1
+
+
+# Time a block into a histogram
+@contextmanager
+def timer(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+# Count a failure the run reported and carried on from, e.g. error('index', year=2024); the CLI
+# exits with status 1 when any was counted, so cron can tell the run failed
+def error(stage, **fields):
+    inc('run_errors_total', stage=stage)
+    log('run_error', stage=stage, **fields)
+
+
+# Number of failures counted by error() so far
+def errors():
+    with _lock:
+        return sum(value for (name, _), value in _counters.items() if name == 'run_errors_total')
+
+
+# Append one structured event to the JSON-lines log (CONGRESS_TRADES_METRICS_LOG; '-' is stderr)
+def log(event, **fields):
+    global _log_file
+    if not config.METRICS_LOG:
+        return
+    line = json.dumps({'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'), 'event': event, **fields},
+                      default=str)
+    with _lock:
+        if _log_file is None:
+            _log_file = sys.stderr if config.METRICS_LOG == '-' else open(config.METRICS_LOG, 'a', buffering=1)
+        _log_file.write(line + '\n')
+
+
+def _labels(labels, extra=()):
+    labels = list(labels) + list(extra)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+
+
+# Every metric in the Prometheus text exposition format
+def render():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: {**value, 'buckets': list(value['buckets'])} for key, value in _histograms.items()}
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f'# TYPE {PREFIX}{name} counter')
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{PREFIX}{name}{_labels(labels)} {value}')
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f'# TYPE {PREFIX}{name} histogram')
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram['buckets']):
+                cumulative += count
+                lines.append(f'{PREFIX}{name}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{PREFIX}{name}_bucket{_labels(labels, [("le", "+Inf")])} {histogram["count"]}')
+            lines.append(f'{PREFIX}{name}_sum{_labels(labels)} {histogram["sum"]:.6f}')
+            lines.append(f'{PREFIX}{name}_count{_labels(labels)} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+# Counter totals and histogram count/sum, keyed by name and labels, for the end-of-run log line
+def summary():
+    with _lock:
+        result = {}
+        for (name, labels), value in _counters.items():
+            result[name + _labels(labels)] = value
+        for (name, labels), histogram in _histograms.items():
+            result[name + _labels(labels)] = {'count': histogram['count'], 'seconds': round(histogram['sum'], 3)}
+    return result
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Serve /metrics on localhost while the run lasts when CONGRESS_TRADES_METRICS_PORT is set
+def start(port=config.METRICS_PORT):
+    global _server
+    if port and _server is None:
+        _server = http.server.ThreadingHTTPServer(('127.0.0.1', port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+
+
+# End of a run: log the totals and write the Prometheus textfile (CONGRESS_TRADES_METRICS_TEXTFILE)
+# atomically, for node_exporter's textfile collector
+def flush(run):
+    log('run_complete', run=run, metrics=summary())
+    if config.METRICS_TEXTFILE:
+        tmp_path = config.METRICS_TEXTFILE + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(render())
+        os.replace(tmp_path, config.METRICS_TEXTFILE)
@@ -0,0 +1,123 @@
+import multiprocessing
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from congress_trades import config, metrics
+from congress_trades.doc_cache import content_hash
+from congress_trades.ptr import parse_pdf_layout, parse_text, pdf_bytes_to_text
+
+
+# Outcome of parsing one filing; Content_Hash is the SHA-256 of its PDF (None if it was never downloaded)
+ParsedDocument = namedtuple('ParsedDocument', ['Year', 'DocID', 'records', 'error', 'Content_Hash'])
+
+
+# Worker entry point for PDF bytes. Failures are returned as text so one bad PDF only loses
+# its own records. The extracted text is sent back when the caller wants to cache it, and
+# the time spent in the worker is sent back for the parse latency metric. In layout mode no
+# text is extracted unless the filing has no transactions table and falls back to the text parser.
+def _parse_document(year, doc_id, content, return_text=False, extraction='text'):
+    start = time.perf_counter()
+    try:
+        if extraction == 'layout':
+            records = parse_pdf_layout(content, year, doc_id)
+            if records is not None:
+                return year, doc_id, records, None, None, time.perf_counter() - start
+        text = pdf_bytes_to_text(content)
+        records = parse_text(text, year, doc_id)
+        return year, doc_id, records, None, text if return_text else None, time.perf_counter() - start
+    except Exception as e:
+        return year, doc_id, [], f"{type(e).__name__}: {e}", None, time.perf_counter() - start
+
+
+# Worker entry point for text already extracted on an earlier run
+def _parse_cached_text(year, doc_id, text):
+    start = time.perf_counter()
+    try:
+        return year, doc_id, parse_text(text, year, doc_id), None, None, time.perf_counter() - start
+    except Exception as e:
+        return year, doc_id, [], f"{type(e).__name__}: {e}", None, time.perf_counter() - start
+
+
+# Process pool that turns downloaded PTR PDFs into transaction records.
+# parse_all takes the (year, doc_id, content, error) tuples produced by PdfFetcher.fetch_all
+# and yields a ParsedDocument per filing in the same order, with a bounded number of
+# documents in flight. With a DocumentCache, previously extracted text is parsed directly
+# and newly extracted text is stored; in layout mode (CONGRESS_TRADES_PTR_EXTRACTION=layout) the
+# PDF itself is always parsed, since cached text has lost the table's positions.
+# A worker that dies (a MuPDF crash, out of memory) breaks the whole executor: it is replaced,
+# and every filing that was in flight on it is returned as failed, so the ledger retries it.
+class ParsePool:
+    def __init__(self, workers=config.PARSE_WORKERS, cache=None, extraction=config.PTR_EXTRACTION):
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.extraction = extraction
+        self._executor = self._start_executor()
+
+    def _start_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    # Replace the executor a crashed worker broke; futures of an executor already replaced are ignored
+    def _restart(self, executor):
+        if executor is self._executor:
+            metrics.inc('parse_pool_restarts_total')
+            executor.shutdown(wait=False)
+            self._executor = self._start_executor()
+
+    def _submit(self, year, doc_id, content):
+        if self.cache is not None and self.extraction == 'text':
+            text = self.cache.get_text(year, doc_id)
+            if text is not None:
+                return self._submit_to_executor(_parse_cached_text, year, doc_id, text)
+        return self._submit_to_executor(_parse_document, year, doc_id, content, self.cache is not None, self.extraction)
+
+    # Submit a call, restarting the executor once if a worker crash has already broken it
+    def _submit_to_executor(self, func, *args):
+        executor = self._executor
+        try:
+            return executor.submit(func, *args), executor
+        except BrokenProcessPool:
+            self._restart(executor)
+            return self._executor.submit(func, *args), self._executor
+
+    def parse_all(self, documents):
+        window = self.workers * 4
+        pending = deque()
+        for year, doc_id, content, error in documents:
+            if error is not None:
+                pending.append((year, doc_id, None, None, str(error)))
+            else:
+                pending.append((year, doc_id, self._submit(year, doc_id, content), content_hash(content), None))
+            if len(pending) >= window:
+                yield self._result(*pending.popleft())
+        while pending:
+            yield self._result(*pending.popleft())
+
+    # ParsedDocument of one pending filing; submitted is (future, executor), or None when the
+    # download already failed with error
+    def _result(self, year, doc_id, submitted, digest, error):
+        records, text, seconds = [], None, None
+        if submitted is not None:
+            future, executor = submitted
+            try:
+                year, doc_id, records, error, text, seconds = future.result()
+            except BrokenProcessPool as e:
+                self._restart(executor)
+                error = f"{type(e).__name__}: {e}"
+        if text is not None:
+            self.cache.put_text(year, doc_id, text)
+        if seconds is not None:
+            metrics.observe('parse_seconds', seconds)
+        metrics.inc('documents_total', result='ok' if error is None else 'failed')
+        metrics.inc('records_parsed_total', len(records))
+        return ParsedDocument(year, doc_id, records, error, digest)
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
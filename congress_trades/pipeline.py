@@ -0,0 +1,129 @@
+import queue
+import threading
+import time
+
+from congress_trades import config, metrics
+from congress_trades.frames import records_to_frame
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+# Run an iterable in a background thread and hand its items over through a bounded queue,
+# so the stage keeps working while downstream stages are busy but never gets more than
+# maxsize items ahead. Exceptions raised by the stage are re-raised in the consumer.
+def buffered(iterable, maxsize=config.QUEUE_SIZE):
+    items = queue.Queue(maxsize)
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put(item)
+        except BaseException as e:
+            items.put(_Failure(e))
+        finally:
+            items.put(_DONE)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item = items.get()
+        if item is _DONE:
+            return
+        if isinstance(item, _Failure):
+            raise item.error
+        yield item
+
+
+# Group parsed documents into typed DataFrames of at most chunk_rows transaction rows.
+# Each chunk is yielded with the documents whose last row it holds (failed and empty
+# documents included), so a document is only reported once all of its rows are loaded.
+def chunk_records(parsed, chunk_rows=config.CHUNK_ROWS):
+    records = []
+    ends = []
+    for document in parsed:
+        if document.error is not None:
+            metrics.log('document_failed', year=document.Year, doc_id=document.DocID, error=document.error)
+            print(f"Error processing {document.DocID}: {document.error}")
+        else:
+            records.extend(document.records)
+        ends.append((document, len(records)))
+        while len(records) >= chunk_rows:
+            completed = [doc for doc, end in ends if end <= chunk_rows]
+            ends = [(doc, end - chunk_rows) for doc, end in ends if end > chunk_rows]
+            yield records_to_frame(records[:chunk_rows]), completed
+            del records[:chunk_rows]
+    if records or ends:
+        yield records_to_frame(records), [doc for doc, _ in ends]
+
+
+# Apply one stage function to a chunk, timing it into stage_seconds; empty chunks pass through
+def _timed_stage(stage, func, chunk):
+    if not len(chunk):
+        return chunk
+    with metrics.timer('stage_seconds', stage=stage):
+        return func(chunk)
+
+
+# Streaming index -> fetch -> parse -> enrich -> clean -> load pipeline.
+# doc_ids is a (possibly lazy) iterable of (Year, DocID); enrich and clean each take and
+# return one chunk DataFrame. load(chunk, completed) receives every cleaned chunk together
+# with the (ParsedDocument, Line_Numbers loaded) pairs of the documents it completes, so it can
+# checkpoint them and drop their stale lines in the same transaction, and returns whether the
+# chunk was committed. A
+# document with rows in a chunk that failed to load is handed over with its error set once
+# it completes, so it is recorded as failed rather than loaded. Every stage runs concurrently
+# behind a bounded queue, so memory stays flat however many filings there are and the first
+# chunk is loaded as soon as chunk_rows rows have been parsed. Returns the number of rows loaded.
+def run_pipeline(doc_ids, fetcher, parse_pool, enrich, clean, load,
+                 chunk_rows=config.CHUNK_ROWS, queue_size=config.QUEUE_SIZE):
+    documents = buffered(fetcher.fetch_all(buffered(doc_ids, queue_size)), queue_size)
+    parsed = buffered(parse_pool.parse_all(documents), queue_size)
+    chunks = buffered(chunk_records(parsed, chunk_rows), 2)
+    enriched = buffered(((_timed_stage('enrich', enrich, chunk), completed) for chunk, completed in chunks), 2)
+
+    loaded = 0
+    document_lines = {}
+    failed = set()
+    for chunk, completed in enriched:
+        chunk = _timed_stage('clean', clean, chunk)
+        chunk_lines = {
+            (int(year), str(doc_id)): [int(line) for line in lines]
+            for (year, doc_id), lines in chunk.groupby(['Year', 'ID'], observed=True)['Line_Number']
+        }
+        completed_keys = set()
+        completed_rows = []
+        for doc in completed:
+            key = (int(doc.Year), str(doc.DocID))
+            completed_keys.add(key)
+            lines = document_lines.pop(key, []) + chunk_lines.get(key, [])
+            if key in failed:
+                failed.discard(key)
+                if doc.error is None:
+                    doc = doc._replace(error='rows in an earlier chunk failed to load')
+                lines = []
+            completed_rows.append((doc, lines))
+        if not len(chunk) and not completed_rows:
+            continue
+        start = time.perf_counter()
+        committed = load(chunk, completed_rows)
+        seconds = time.perf_counter() - start
+        metrics.observe('stage_seconds', seconds, stage='load')
+        metrics.log('chunk_loaded', rows=len(chunk), documents=len(completed_rows),
+                    seconds=round(seconds, 4), committed=committed)
+        # Lines of documents that continue in later chunks only count once their chunk is committed
+        for key, lines in chunk_lines.items():
+            if key in completed_keys:
+                continue
+            if committed:
+                document_lines.setdefault(key, []).extend(lines)
+            else:
+                document_lines.pop(key, None)
+                failed.add(key)
+        if committed:
+            metrics.inc('rows_loaded_total', len(chunk))
+            loaded += len(chunk)
+    return loaded
@@ -0,0 +1,153 @@
+import io
+
+from congress_trades import config, db, metrics
+
+# Future price columns this job fills in, by days after the trade
+BACKFILL_HORIZONS = {50: 'Price_in_50_Days', 100: 'Price_in_100_Days'}
+
+# Configured horizons without a column in congress_stock_trades, kept in congress_trade_prices
+EXTRA_HORIZONS = sorted(days for days in config.PRICE_HORIZONS if days not in (0, *BACKFILL_HORIZONS))
+
+# Columns of the pending trades returned by fetch_pending_prices
+PENDING_COLUMNS = ['record_id', 'Year', 'ID', 'Line_Number', 'Ticker', 'Date']
+
+
+# Query the database for every trade whose 50 or 100 day horizon, or any extra horizon, has passed
+# but whose price is still missing (NULL or NaN, or no congress_trade_prices row). There is no
+# lower date bound, so trades skipped by missed runs are picked up by the next one; only trades
+# given up on by give_up are left out.
+def fetch_pending_prices(conn, extra_horizons=EXTRA_HORIZONS):
+    query = """
+    SELECT record_id, Year, ID, Line_Number, Ticker, Date
+    FROM congress_stock_trades t
+    WHERE Ticker IS NOT NULL
+    AND Prices_Given_Up IS NULL
+    AND (
+        (Date + 50 < CURRENT_DATE AND (Price_in_50_Days IS NULL OR Price_in_50_Days = 'NaN'))
+        OR (Date + 100 < CURRENT_DATE AND (Price_in_100_Days IS NULL OR Price_in_100_Days = 'NaN'))
+    """
+    params = ()
+    if extra_horizons:
+        query += """
+        OR EXISTS (
+            SELECT 1 FROM unnest(%s::INT[]) h
+            WHERE t.Date + h < CURRENT_DATE
+            AND NOT EXISTS (
+                SELECT 1 FROM congress_trade_prices p
+                WHERE p.Year = t.Year AND p.ID = t.ID AND p.Line_Number = t.Line_Number AND p.Horizon_Days = h
+            )
+        )
+        """
+        params = (list(extra_horizons),)
+    with conn.cursor() as cursor:
+        cursor.execute(query + ")", params)
+        return cursor.fetchall()
+
+
+# Resolve the missing horizons for all pending trades at once from the local price store
+def get_prices(pending, price_store, extra_horizons=EXTRA_HORIZONS):
+    from congress_trades.price_lookup import horizon_column, lookup_prices
+    horizons = [*BACKFILL_HORIZONS, *extra_horizons]
+    prices = lookup_prices(pending, price_store, horizons=horizons, date_format=None)
+    found = pending[['record_id', 'Year', 'ID', 'Line_Number', 'Ticker', 'Date']].join(prices)
+    return found.dropna(subset=[horizon_column(days) for days in horizons], how='all')
+
+
+# Record ids of the pending trades to give up on: every horizon ended, with its lookahead, at least
+# PRICE_GIVE_UP_DAYS ago, the price store has asked for the ticker's closes past that end, and a
+# price is still missing. Unknown or delisted tickers never get those closes.
+def exhausted_trades(pending, found, price_store, extra_horizons=EXTRA_HORIZONS, give_up_days=config.PRICE_GIVE_UP_DAYS):
+    import pandas as pd
+    from congress_trades.price_lookup import horizon_column
+    from congress_trades.price_store import LOOKAHEAD_DAYS
+    horizons = [*BACKFILL_HORIZONS, *extra_horizons]
+    window_end = pd.to_datetime(pending['Date']) + pd.Timedelta(days=max(horizons) + LOOKAHEAD_DAYS)
+    checked = {ticker: price_store.checked_through(ticker) for ticker in pending['Ticker'].unique()}
+    checked = pd.to_datetime(pending['Ticker'].map(checked))
+    priced = found.set_index('record_id')[[horizon_column(days) for days in horizons]].notna().all(axis=1)
+    priced = pending['record_id'].isin(priced.index[priced])
+    due = (window_end + pd.Timedelta(days=give_up_days) <= pd.Timestamp.today().normalize()) & (checked >= window_end)
+    return pending.loc[due & ~priced, 'record_id'].tolist()
+
+
+# Lock the pending trades that still hold the ticker and date their prices were looked up for.
+# Lines deleted or reloaded with another trade since fetch_pending_prices are left out.
+# Returns their record ids.
+def unchanged_trades(conn, trades):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        SELECT t.record_id
+        FROM congress_stock_trades t
+        JOIN unnest(%s::INT[], %s::TEXT[], %s::DATE[]) AS p(record_id, Ticker, Date) ON t.record_id = p.record_id
+        WHERE t.Ticker = p.Ticker AND t.Date = p.Date
+        FOR UPDATE OF t
+        """, ([int(record_id) for record_id in trades['record_id']], trades['Ticker'].tolist(), trades['Date'].tolist()))
+        return {record_id for (record_id,) in cursor.fetchall()}
+
+
+# Mark trades as given up so later runs no longer select them; returns the number marked
+def give_up(conn, record_ids):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "UPDATE congress_stock_trades SET Prices_Given_Up = CURRENT_DATE WHERE record_id = ANY(%s::INT[])",
+            ([int(record_id) for record_id in record_ids],)
+        )
+        return cursor.rowcount
+
+
+# Stage the found prices in a temporary table and apply them with a single UPDATE ... FROM.
+# Only missing values are overwritten, so re-running the job is a no-op.
+def update_stock_prices(conn, found):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        CREATE TEMP TABLE price_backfill (
+            record_id INT PRIMARY KEY,
+            Price_in_50_Days NUMERIC(20, 6),
+            Price_in_100_Days NUMERIC(20, 6)
+        ) ON COMMIT DROP
+        """)
+        buffer = io.StringIO()
+        found[['record_id', *BACKFILL_HORIZONS.values()]].to_csv(buffer, header=False, index=False, na_rep='\\N')
+        buffer.seek(0)
+        cursor.copy_expert("COPY price_backfill FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+        cursor.execute("""
+        UPDATE congress_stock_trades t
+        SET Price_in_50_Days = COALESCE(NULLIF(t.Price_in_50_Days, 'NaN'), s.Price_in_50_Days),
+            Price_in_100_Days = COALESCE(NULLIF(t.Price_in_100_Days, 'NaN'), s.Price_in_100_Days)
+        FROM price_backfill s
+        WHERE t.record_id = s.record_id
+        AND (NULLIF(t.Price_in_50_Days, 'NaN') IS NULL AND s.Price_in_50_Days IS NOT NULL
+             OR NULLIF(t.Price_in_100_Days, 'NaN') IS NULL AND s.Price_in_100_Days IS NOT NULL)
+        """)
+        updated = cursor.rowcount
+    from congress_trades.loader import upsert_horizon_prices
+    return updated + upsert_horizon_prices(conn, found)
+
+
+# Backfill missing prices. The prices are resolved, downloading what the price store lacks, before
+# the transaction that writes them is opened, so no lock is held during downloads. Trades that can
+# no longer be priced are given up in the same transaction. pandas and yfinance are only imported
+# when some trade is pending, so a run with nothing to do exits at once.
+def run():
+    with db.connection() as conn:
+        pending = fetch_pending_prices(conn)
+    updated = given_up = 0
+    if pending:
+        import pandas as pd
+        from congress_trades.price_store import PriceStore
+        price_store = PriceStore()
+        pending = pd.DataFrame(pending, columns=PENDING_COLUMNS)
+        found = get_prices(pending, price_store)
+        exhausted = exhausted_trades(pending, found, price_store)
+        with db.transaction() as conn:
+            unchanged = unchanged_trades(conn, pending)
+            found = found[found['record_id'].isin(unchanged)]
+            updated = update_stock_prices(conn, found) if len(found) else 0
+            given_up = give_up(conn, [record_id for record_id in exhausted if record_id in unchanged]) if exhausted else 0
+    metrics.inc('prices_pending_total', len(pending))
+    metrics.inc('prices_updated_total', updated)
+    metrics.inc('prices_given_up_total', given_up)
+    print(f"{len(pending)} trades missing future prices, {updated} updated, {given_up} given up.")
+    from congress_trades.analytics import update_analytics
+    update_analytics()
+    return updated
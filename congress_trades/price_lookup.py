@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from congress_trades import config, metrics
+from congress_trades.price_store import LOOKAHEAD_DAYS
+
+
+# Column holding the close a given number of days after the trade
+def horizon_column(days):
+    if days == 0:
+        return 'Average_Price'
+    return f'Price_in_{days}_Days'
+
+
+# Long (Ticker, PriceDate, Close) frame of the stored closes for the given tickers between first
+# and last; histories go back decades, so only the window the trades can match is copied
+def _price_frame(price_store, tickers, first, last):
+    first = np.datetime64(first, 'D')
+    last = np.datetime64(last, 'D')
+    frames = []
+    for ticker in tickers:
+        prices = price_store.series(ticker)
+        dates = prices['date']
+        prices = prices[np.searchsorted(dates, first, side='left'):np.searchsorted(dates, last, side='right')]
+        if len(prices) == 0:
+            continue
+        frames.append(pd.DataFrame({
+            'Ticker': ticker,
+            'PriceDate': np.asarray(prices['date']).astype('datetime64[ns]'),
+            'Close': np.asarray(prices['close']),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=['Ticker', 'PriceDate', 'Close'])
+    return pd.concat(frames, ignore_index=True).sort_values('PriceDate', kind='stable')
+
+
+# Resolve "close on the first trading day on or after Date + N days" for every row at once.
+# Each horizon is one sorted as-of join of the trades against the stored daily closes,
+# returning one column per horizon aligned with df's index. date_format is only used when
+# Date holds strings; pass None for columns of date objects.
+def lookup_prices(df, price_store, horizons=config.PRICE_HORIZONS, date_format='%m/%d/%Y'):
+    columns = [horizon_column(days) for days in horizons]
+    result = pd.DataFrame(np.nan, index=df.index, columns=columns)
+    if df.empty:
+        return result
+
+    trade_dates = df['Date']
+    if not pd.api.types.is_datetime64_any_dtype(trade_dates):
+        trade_dates = pd.to_datetime(trade_dates, format=date_format, errors='coerce')
+    trades = pd.DataFrame({
+        '_row': np.arange(len(df)),
+        'Ticker': df['Ticker'].to_numpy(dtype=object),
+        'TradeDate': trade_dates.to_numpy(dtype='datetime64[ns]'),
+    })
+    trades = trades[trades['Ticker'].notna() & trades['TradeDate'].notna()]
+    if trades.empty:
+        return result
+
+    # Bring every ticker's store up to the furthest date any horizon needs, in one batched pass
+    reach = pd.Timedelta(days=max(horizons) + LOOKAHEAD_DAYS)
+    last_needed = trades.groupby('Ticker')['TradeDate'].max() + reach
+    errors = price_store.ensure_many({ticker: end.date() for ticker, end in last_needed.items()})
+    for ticker, e in errors.items():
+        metrics.inc('yfinance_errors_total', call='download')
+        metrics.log('yfinance_error', call='download', ticker=ticker, error=str(e))
+        print(f"Error retrieving prices for {ticker}: {e}")
+    first = trades['TradeDate'].min() + pd.Timedelta(days=min(horizons))
+    prices = _price_frame(price_store, last_needed.index, first, trades['TradeDate'].max() + reach)
+    if prices.empty:
+        return result
+    # as-of joins need identical key dtypes; pandas may infer a string dtype on either side
+    trades['Ticker'] = trades['Ticker'].astype(object)
+    prices['Ticker'] = prices['Ticker'].astype(object)
+
+    values = result.to_numpy(copy=True)
+    for col, days in enumerate(horizons):
+        targets = trades.assign(Target=trades['TradeDate'] + pd.Timedelta(days=days)).sort_values('Target', kind='stable')
+        matched = pd.merge_asof(
+            targets, prices, left_on='Target', right_on='PriceDate', by='Ticker',
+            direction='forward', tolerance=pd.Timedelta(days=LOOKAHEAD_DAYS - 1)
+        )
+        values[matched['_row'].to_numpy(), col] = matched['Close'].round(3).to_numpy()
+    return pd.DataFrame(values, index=df.index, columns=columns)
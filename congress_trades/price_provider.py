@@ -0,0 +1,84 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from congress_trades import config, metrics
+
+# One row per trading day: calendar date and closing price
+PRICE_DTYPE = np.dtype([('date', 'datetime64[D]'), ('close', 'float64')])
+
+
+# Convert a history frame with a Close column into a sorted PRICE_DTYPE array
+def history_to_array(hist):
+    if hist is None or hist.empty:
+        return np.empty(0, dtype=PRICE_DTYPE)
+    index = hist.index
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    prices = np.empty(len(hist), dtype=PRICE_DTYPE)
+    prices['date'] = index.values.astype('datetime64[D]')
+    prices['close'] = hist['Close'].to_numpy(dtype='float64')
+    return prices[~np.isnan(prices['close'])]
+
+
+# Daily closes from yfinance. Providers share one method, download(tickers, start, end), which
+# returns {ticker: PRICE_DTYPE array} for the days from start (None for the full history) up to
+# but not including end. Every call here is a single multi-ticker request. Closes are split- and
+# dividend-adjusted, so a later download can re-base days already stored; PriceStore re-downloads
+# the full history of a ticker when that happens.
+class YFinanceProvider:
+    def download(self, tickers, start, end):
+        tickers = list(tickers)
+        if start is None:
+            period = {'period': 'max'}
+        else:
+            period = {'start': str(start), 'end': str(end)}
+        metrics.inc('yfinance_requests_total', call='download')
+        with metrics.timer('yfinance_seconds', call='download'):
+            hist = yf.download(tickers, group_by='ticker', auto_adjust=True, actions=False,
+                               threads=False, progress=False, **period)
+        prices = {}
+        for ticker in tickers:
+            if isinstance(hist.columns, pd.MultiIndex):
+                frame = hist[ticker] if ticker in hist.columns.get_level_values(0) else None
+            else:
+                frame = hist
+            prices[ticker] = history_to_array(frame)
+        return prices
+
+
+# Daily closes read from a local Ticker,Date,Close CSV (optionally gzipped), for offline runs and
+# benchmarks. The file is read once, on the first download.
+class FileProvider:
+    def __init__(self, path):
+        self.path = path
+        self._prices = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._prices is None:
+                frame = pd.read_csv(self.path, usecols=['Ticker', 'Date', 'Close'], parse_dates=['Date'])
+                frame = frame.dropna().sort_values(['Ticker', 'Date'], kind='stable')
+                self._prices = {ticker: history_to_array(group.set_index('Date'))
+                                for ticker, group in frame.groupby('Ticker')}
+        return self._prices
+
+    def download(self, tickers, start, end):
+        stored = self._load()
+        prices = {}
+        for ticker in tickers:
+            series = stored.get(ticker, np.empty(0, dtype=PRICE_DTYPE))
+            first = 0 if start is None else np.searchsorted(series['date'], start, side='left')
+            last = np.searchsorted(series['date'], end, side='left')
+            prices[ticker] = series[first:last]
+        return prices
+
+
+# Provider used when none is given: the CONGRESS_TRADES_PRICE_FILE file if set, otherwise yfinance
+def default_provider():
+    if config.PRICE_FILE:
+        return FileProvider(config.PRICE_FILE)
+    return YFinanceProvider()
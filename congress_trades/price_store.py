@@ -0,0 +1,269 @@
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from congress_trades import config, metrics
+from congress_trades.price_provider import PRICE_DTYPE, default_provider
+
+# Number of calendar days searched forward for the next trading day
+LOOKAHEAD_DAYS = 5
+
+# Hours before a ticker whose download came back empty is asked for again. yfinance returns no
+# rows instead of raising for tickers it failed to fetch, so an empty answer is not final.
+EMPTY_RETRY_HOURS = 6
+
+# Relative difference between a stored close and the same day downloaded again above which the
+# provider is taken to have re-based the history (a split or dividend adjustment)
+REBASE_TOLERANCE = 1e-4
+
+
+def _to_day(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    return np.datetime64(value, 'D')
+
+
+# Group missing ranges into shared downloads: tickers with no history yet are fetched in full,
+# the rest from the earliest missing day among them. Every range ends today, so they all overlap
+# and one range covers them. Returns [(start, tickers)], start None meaning the full history.
+def _merge_ranges(starts):
+    new = sorted(ticker for ticker, start in starts.items() if start is None)
+    stale = sorted(ticker for ticker, start in starts.items() if start is not None)
+    ranges = []
+    if new:
+        ranges.append((None, new))
+    if stale:
+        ranges.append((min(starts[ticker] for ticker in stale), stale))
+    return ranges
+
+
+# Local daily close store keyed by ticker.
+# Each ticker's full history is downloaded once and saved as a .npy file that is
+# memory-mapped on read; later calls only download the days after the covered range, plus the
+# last stored day. Adjusted closes change after every split or dividend, so when that day comes
+# back different the ticker's full history is downloaded again instead of being appended to,
+# and a stored series never mixes two adjustment bases.
+# Downloads go through a pluggable provider (yfinance, or a local file offline), batched over
+# many tickers at a time.
+class PriceStore:
+    def __init__(self, root=config.PRICE_STORE_DIR, provider=None,
+                 batch_tickers=config.PRICE_BATCH_TICKERS, workers=config.PRICE_FETCH_WORKERS):
+        self.root = root
+        self.provider = provider if provider is not None else default_provider()
+        self.batch_tickers = max(1, batch_tickers)
+        self.workers = max(1, workers)
+        os.makedirs(root, exist_ok=True)
+        self._index_path = os.path.join(root, 'index.json')
+        self._index = self._load_index()
+        self._series = {}
+        self._inflight = {}
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Lock()
+
+    def _load_index(self):
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _path(self, ticker):
+        return os.path.join(self.root, quote(ticker, safe='') + '.npy')
+
+    def _write_series(self, ticker, prices):
+        path = self._path(ticker)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, prices)
+        os.replace(tmp_path, path)
+        self._series[ticker] = prices
+
+    # Return the stored price array for a ticker (empty if never fetched)
+    def series(self, ticker):
+        prices = self._series.get(ticker)
+        if prices is None:
+            try:
+                prices = np.load(self._path(ticker), mmap_mode='r')
+            except FileNotFoundError:
+                prices = np.empty(0, dtype=PRICE_DTYPE)
+            self._series[ticker] = prices
+        return prices
+
+    # Make sure the store covers a ticker's history up to end, downloading only what is missing.
+    # Raises the download's error if it failed.
+    def ensure(self, ticker, end=None):
+        error = self.ensure_many({ticker: end}).get(ticker)
+        if error is not None:
+            raise error
+
+    # Bring every ticker of ends ({ticker: last day needed}) up to date at once. The missing ranges
+    # are merged and downloaded in multi-ticker batches, at most workers at a time, so the number
+    # of requests follows the number of distinct tickers, not trades. A ticker another caller is
+    # already downloading is waited for instead of fetched again. Days from today onward are never
+    # considered covered because their close is not final. Returns {ticker: error} for the
+    # tickers whose download failed.
+    def ensure_many(self, ends):
+        today = np.datetime64(date.today(), 'D')
+        starts = {}
+        waiting = {}
+        with self._lock:
+            for ticker, end in ends.items():
+                end = min(_to_day(end) if end is not None else today, today - 1)
+                covered = self._index.get(ticker)
+                if covered is not None and (
+                    (covered['end'] is not None and end <= np.datetime64(covered['end'], 'D'))
+                    or covered.get('retry_after', '') > datetime.now().isoformat(timespec='seconds')
+                ):
+                    metrics.inc('price_store_requests_total', result='hit')
+                    continue
+                metrics.inc('price_store_requests_total', result='miss')
+                if ticker in self._inflight:
+                    waiting[ticker] = self._inflight[ticker]
+                    continue
+                self._inflight[ticker] = Future()
+                starts[ticker] = self._resume_day(ticker, covered)
+
+        errors = {}
+        if starts:
+            errors.update(self._download(starts, today))
+        for ticker, future in waiting.items():
+            error = future.exception()
+            if error is not None:
+                errors[ticker] = error
+        return errors
+
+    # First day an incremental download of a covered ticker starts from: its last stored day, so
+    # the download shows whether the stored history was re-based. None means the full history.
+    def _resume_day(self, ticker, covered):
+        if covered is None or covered['end'] is None:
+            return None
+        prices = self.series(ticker)
+        if len(prices):
+            return np.datetime64(prices['date'][-1], 'D')
+        return np.datetime64(covered['end'], 'D') + 1
+
+    # Download the missing ranges of starts ({ticker: first missing day or None}) up to today,
+    # store them and release the tickers' in-flight futures. Tickers whose history was re-based
+    # are then downloaded again in full. Returns {ticker: error}.
+    def _download(self, starts, today):
+        errors = {}
+        rebased = self._download_batches(starts, today, errors)
+        if rebased:
+            metrics.inc('price_store_rebases_total', len(rebased))
+            self._download_batches(dict.fromkeys(rebased), today, errors)
+        return errors
+
+    # One round of batched downloads for starts; errors are added to errors. Returns the re-based
+    # tickers, whose in-flight futures are left for the full download.
+    def _download_batches(self, starts, today, errors):
+        batches = [(start, tickers[i:i + self.batch_tickers])
+                   for start, tickers in _merge_ranges(starts)
+                   for i in range(0, len(tickers), self.batch_tickers)]
+        rebased = []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as pool:
+            pending = {pool.submit(self._fetch, tickers, start, today): tickers
+                       for start, tickers in batches}
+            for future in as_completed(pending):
+                tickers = pending[future]
+                try:
+                    empty, stale = self._store(tickers, future.result(), starts, today)
+                except Exception as e:
+                    for ticker in tickers:
+                        errors[ticker] = e
+                    self._release(tickers, e)
+                    continue
+                # Days after the covered range can be legitimately empty (weekends, holidays);
+                # a missing full history is reported
+                for ticker in empty:
+                    if starts[ticker] is None:
+                        errors[ticker] = LookupError(f"no prices returned for {ticker}")
+                rebased.extend(stale)
+                self._release([ticker for ticker in tickers if ticker not in stale])
+        return rebased
+
+    # One provider download; at most workers run at once across all callers of this store
+    def _fetch(self, tickers, start, end):
+        with self._slots:
+            return self.provider.download(tickers, start, end)
+
+    # Save a batch's downloaded prices, appending them to what is stored for incremental ranges.
+    # A ticker that came back empty keeps its covered range and is only retried after
+    # EMPTY_RETRY_HOURS, so a failed download is never mistaken for a ticker without history.
+    # A ticker whose downloaded days disagree with the stored ones is left untouched.
+    # Returns (tickers that came back empty, tickers whose stored history was re-based).
+    def _store(self, tickers, fetched, starts, today):
+        empty = []
+        rebased = []
+        for ticker in tickers:
+            new_prices = fetched.get(ticker)
+            if new_prices is None or len(new_prices) == 0:
+                empty.append(ticker)
+                continue
+            if starts[ticker] is None:
+                prices = new_prices
+            else:
+                stored = np.asarray(self.series(ticker))
+                _, old, new = np.intersect1d(stored['date'], new_prices['date'], return_indices=True)
+                if not np.allclose(new_prices['close'][new], stored['close'][old], rtol=REBASE_TOLERANCE, atol=0):
+                    rebased.append(ticker)
+                    continue
+                prices = np.concatenate([stored, new_prices])
+                _, keep = np.unique(prices['date'][::-1], return_index=True)
+                prices = prices[::-1][keep]
+            self._write_series(ticker, prices)
+        with self._lock:
+            fetched_at = datetime.now()
+            retry_after = (fetched_at + timedelta(hours=EMPTY_RETRY_HOURS)).isoformat(timespec='seconds')
+            for ticker in tickers:
+                if ticker in rebased:
+                    continue
+                if ticker in empty:
+                    covered = self._index.get(ticker) or {'end': None}
+                    self._index[ticker] = {**covered, 'retry_after': retry_after, 'checked': str(today - 1)}
+                else:
+                    self._index[ticker] = {'end': str(today - 1), 'fetched_at': fetched_at.isoformat(timespec='seconds')}
+            self._save_index()
+        return empty, rebased
+
+    # Wake the callers waiting on these tickers' downloads
+    def _release(self, tickers, error=None):
+        with self._lock:
+            for ticker in tickers:
+                future = self._inflight.pop(ticker)
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+    # Last day the provider has been asked about for a ticker, whether or not it had prices up to
+    # then, as a numpy day; None if it was never downloaded
+    def checked_through(self, ticker):
+        covered = self._index.get(ticker) or {}
+        days = [np.datetime64(covered[key], 'D') for key in ('end', 'checked') if covered.get(key)]
+        return max(days) if days else None
+
+    # Daily closes for a ticker as a Series indexed by date
+    def history(self, ticker):
+        prices = self.series(ticker)
+        return pd.Series(np.asarray(prices['close']), index=pd.DatetimeIndex(np.asarray(prices['date'])), name='Close')
+
+    # Close on the first trading day on or after start_date + days_ahead, searching LOOKAHEAD_DAYS days
+    def close_on_or_after(self, ticker, start_date, days_ahead=0):
+        target = _to_day(start_date) + days_ahead
+        prices = self.series(ticker)
+        idx = np.searchsorted(prices['date'], target, side='left')
+        if idx < len(prices) and prices['date'][idx] < target + LOOKAHEAD_DAYS:
+            return float(prices['close'][idx])
+        return None
@@ -0,0 +1,309 @@
+import re
+from collections import namedtuple
+
+import fitz  # PyMuPDF
+import numpy as np
+import requests
+
+
+# Extract PDF text from URL. With a DocumentCache and the filing's (year, doc_id), cached text
+# or a cached PDF is used first and anything downloaded or extracted is added to the cache.
+def pdf_url_to_text(url, headers, cache=None, year=None, doc_id=None):
+    if cache is None or year is None or doc_id is None:
+        response = requests.get(url, headers=headers)
+        response.raise_for_status()
+        return pdf_bytes_to_text(response.content)
+
+    text = cache.get_text(year, doc_id)
+    if text is not None:
+        return text
+    content = cache.get_pdf(year, doc_id)
+    if content is None:
+        response = requests.get(url, headers=headers)
+        response.raise_for_status()
+        content = response.content
+        cache.put_pdf(year, doc_id, content)
+    text = pdf_bytes_to_text(content)
+    cache.put_text(year, doc_id, text)
+    return text
+
+
+# Extract text from downloaded PDF bytes
+def pdf_bytes_to_text(content):
+    with fitz.open(stream=content, filetype="pdf") as pdf_document:
+        return "".join(page.get_text() for page in pdf_document)
+
+
+# Sections stripped from the extracted text before parsing
+HEADER_RE = re.compile(r'periodic.*?name:\n', re.IGNORECASE | re.DOTALL)
+STATUS_RE = re.compile(r'\nstatus.*?\nstate/district:', re.IGNORECASE | re.DOTALL)
+TABLE_HEADER_RE = re.compile(r'\ntransactions.*?\namount\n', re.IGNORECASE | re.DOTALL)
+NAME_LABEL_RE = re.compile(r'name: ', re.IGNORECASE)
+
+# Filing-level fields
+TICKER_RE = re.compile(r'\(([^)]+)\)')
+SPLIT_RE = re.compile(r'\(\w+\)')
+DISTRICT_RE = re.compile(r'\|\s*(\S{4})')
+
+# Parenthesised text the PTR parser picks up as a ticker but that is not one
+EXCLUDED_TICKERS = ['PARTIAL', 'MERRILL LYNCH',
+                    'NOT A SALE--THE CONGRESSIONAL PTR SYSTEM DOES NOT HAVE AN "OTHER" TRANSACTION TYPE.']
+
+MAX_TICKER_LENGTH = 10
+
+# One scan per transaction line: type letter, dates and amount, whichever comes first
+DETAIL_RE = re.compile(
+    r'\b(?P<type>[PpSsEe])\b'
+    r'|(?P<date>\d{2}/\d{1,2}/\d{4})'
+    r'|\$(?P<amount>\d{1,3}(?:,\d{3})*(?:,\d{3})*(?:\.\d{2})?)'
+)
+
+# One parsed transaction line of a PTR filing; Line_Number is its 1-based position among the
+# filing's transactions with a ticker, numbered the same way by the text and layout parsers
+Transaction = namedtuple('Transaction', [
+    'Year', 'ID', 'Line_Number', 'Representative', 'District', 'Transaction_Type', 'Ticker', 'Date',
+    'Notification_Date', 'Amount'
+])
+TRANSACTION_COLUMNS = list(Transaction._fields)
+
+
+# Whether parenthesised text is a ticker rather than a note. Only tickers are numbered, so a
+# filing's transactions keep their Line_Number whichever extraction parsed them.
+def is_ticker(symbol):
+    return symbol.upper() not in EXCLUDED_TICKERS and len(symbol) <= MAX_TICKER_LENGTH
+
+
+# Clean the extracted text from the PDF
+def clean_pdf_text(text):
+    cleaned_text = HEADER_RE.sub('', text)
+    cleaned_text = STATUS_RE.sub('|', cleaned_text)
+    cleaned_text = TABLE_HEADER_RE.sub(' ', cleaned_text)
+    cleaned_text = cleaned_text.replace('\n', ' ')
+    # Drop everything up to the last "name: " label
+    last_label = None
+    for last_label in NAME_LABEL_RE.finditer(cleaned_text):
+        pass
+    if last_label is not None:
+        cleaned_text = cleaned_text[last_label.end():]
+    cleaned_text = cleaned_text.replace('(partial)', '')
+    cleaned_text = cleaned_text.replace('401(K)', '')
+    return cleaned_text
+
+
+# Transaction type, trade date, notification date and amount of one transaction line
+def parse_details(details):
+    transaction_type = amount = None
+    dates = []
+    for match in DETAIL_RE.finditer(details):
+        kind = match.lastgroup
+        if kind == 'type':
+            if transaction_type is None:
+                transaction_type = match.group('type')
+        elif kind == 'date':
+            if len(dates) < 2:
+                dates.append(match.group('date'))
+        elif amount is None:
+            amount = float(match.group('amount').replace(',', ''))
+        if transaction_type is not None and len(dates) == 2 and amount is not None:
+            break
+    return (
+        transaction_type if transaction_type is not None else np.nan,
+        dates[0] if dates else np.nan,
+        dates[1] if len(dates) == 2 else np.nan,
+        amount if amount is not None else np.nan,
+    )
+
+
+# Process cleaned text into one Transaction per ticker
+def process_cleaned_text(cleaned_text, year, unique_id):
+    tickers = TICKER_RE.findall(cleaned_text)
+    transactions = SPLIT_RE.split(cleaned_text)[1:]
+    separator = cleaned_text.find('|')
+    rep_name = cleaned_text[:separator].strip() if separator >= 0 else np.nan
+    district_match = DISTRICT_RE.search(cleaned_text)
+    district = district_match.group(1).strip() if district_match else np.nan
+    data = []
+    for ticker, details in zip(tickers, transactions):
+        if not is_ticker(ticker):
+            continue
+        transaction_type, date, notification_date, amount = parse_details(details)
+        data.append(Transaction(
+            year, unique_id, len(data) + 1, rep_name, district, transaction_type, ticker, date, notification_date, amount
+        ))
+    return data
+
+
+# Full parse of one filing's extracted text into transaction records
+def parse_text(text, year, doc_id):
+    return process_cleaned_text(clean_pdf_text(text), year, doc_id)
+
+
+# Full parse of one downloaded PTR: PDF bytes to transaction records. With extraction='layout' the
+# table is read by position, falling back to the text parser when it has no transactions table.
+def parse_pdf(content, year, doc_id, extraction='text'):
+    if extraction == 'layout':
+        records = parse_pdf_layout(content, year, doc_id)
+        if records is not None:
+            return records
+    return parse_text(pdf_bytes_to_text(content), year, doc_id)
+
+
+# Layout extraction: the transactions table is read by word position instead of from the flat text.
+# Headings of the table's columns, as the first word of each heading; 'Date' is the trade date
+TABLE_HEADINGS = {'Owner': 'owner', 'Asset': 'asset', 'Transaction': 'type', 'Date': 'date',
+                  'Notification': 'notification', 'Amount': 'amount', 'Cap.': 'gains'}
+
+# Points a word may start left of its column heading and still belong to the column
+COLUMN_SLACK = 2.0
+
+# Sections that follow the transactions table; nothing after them is read
+SECTION_END_RE = re.compile(
+    r'^(?:\* For the complete list|Initial Public Offerings|I P O$|Certification and Signature|C S$|I CERTIFY)',
+    re.IGNORECASE
+)
+
+# Labels of the Filing Status, Description, Subholding Of, Location and Comments lines under an asset,
+# small-caps headings included ("F S: New", "S O: ...")
+DETAIL_LABEL_RE = re.compile(
+    r'^(?:(?:[A-Z] ){0,2}[A-Z]:|Filing Status:|Description:|Subholding Of:|Location:|Comments:)'
+)
+FOOTER_RE = re.compile(r'^Filing ID #\d+$')
+DATE_RE = re.compile(r'\d{2}/\d{1,2}/\d{4}')
+AMOUNT_RE = re.compile(r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)')
+TYPE_RE = re.compile(r'[PpSsEe]')
+
+# Ticker of an asset cell: the parenthesized symbol just before the asset type code, e.g. "Apple Inc. (AAPL) [ST]"
+ASSET_TICKER_RE = re.compile(r'\(([^()]+)\)\s*(?:\[\w+\])?\s*$')
+
+
+# Words of a page grouped into visual lines, top to bottom and left to right within a line
+def _page_lines(page):
+    lines = []
+    for word in sorted(page.get_text('words'), key=lambda word: word[3]):
+        if lines and word[3] - lines[-1][-1][3] <= (word[3] - word[1]) / 2:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return [sorted(line, key=lambda word: word[0]) for line in lines]
+
+
+def _line_text(line):
+    return ' '.join(word[4] for word in line)
+
+
+# Start x of each column from the table's heading line, or None if the line is not the heading
+def _table_columns(line):
+    columns = {}
+    for word in line:
+        column = TABLE_HEADINGS.get(word[4])
+        if column is not None and column not in columns:
+            columns[column] = word[0]
+    if not {'asset', 'type', 'date', 'amount'} <= columns.keys():
+        return None
+    return sorted(columns.items(), key=lambda column: column[1])
+
+
+# Words of a line by column
+def _cells(line, columns):
+    cells = {}
+    for word in line:
+        name = None
+        for column, start in columns:
+            if word[0] + COLUMN_SLACK >= start:
+                name = column
+        if name is not None:
+            cells.setdefault(name, []).append(word[4])
+    return cells
+
+
+# Value following a label such as "Name:" on the filer lines, on the same line or the next one
+def _filer_field(lines, label):
+    for i, line in enumerate(lines):
+        if line[0][4] == label:
+            if len(line) > 1:
+                return _line_text(line[1:])
+            if i + 1 < len(lines):
+                return _line_text(lines[i + 1])
+    return np.nan
+
+
+# A transaction row starts on the line with a trade date or transaction type at the left edge of its column
+def _starts_row(line, columns):
+    starts = dict(columns)
+    for word in line:
+        if abs(word[0] - starts['date']) <= COLUMN_SLACK and DATE_RE.fullmatch(word[4]):
+            return True
+        if abs(word[0] - starts['type']) <= COLUMN_SLACK and TYPE_RE.fullmatch(word[4]):
+            return True
+    return False
+
+
+# One Transaction from the cells of a table row, or None for assets without a ticker
+def _table_record(cells, year, doc_id, line_number, rep_name, district):
+    ticker = ASSET_TICKER_RE.search(' '.join(cells.get('asset', [])))
+    if ticker is None or not is_ticker(ticker.group(1).strip()):
+        return None
+    types = [word for word in cells.get('type', []) if TYPE_RE.fullmatch(word)]
+    dates = [word for word in cells.get('date', []) if DATE_RE.fullmatch(word)]
+    notifications = [word for word in cells.get('notification', []) if DATE_RE.fullmatch(word)]
+    amount = AMOUNT_RE.search(' '.join(cells.get('amount', [])))
+    return Transaction(
+        year, doc_id, line_number, rep_name, district,
+        types[0] if types else np.nan,
+        ticker.group(1).strip(),
+        dates[0] if dates else np.nan,
+        notifications[0] if notifications else np.nan,
+        float(amount.group(1).replace(',', '')) if amount else np.nan,
+    )
+
+
+# Parse a PTR PDF by reading its transactions table by column position. Pages are read one at a
+# time and reading stops at the first section after the table, so certification and comments
+# pages are never extracted. Type and amount text stays in its own column, so "(partial)" sales
+# and parenthesized notes under an asset are not mistaken for tickers. Returns None when no
+# transactions table is found on the first two pages (e.g. scanned paper filings); use the text
+# parser for those.
+def parse_pdf_layout(content, year, doc_id):
+    columns = rep_name = district = None
+    rows = []
+    with fitz.open(stream=content, filetype="pdf") as pdf_document:
+        for page in pdf_document:
+            if columns is None and page.number >= 2:
+                return None
+            lines = _page_lines(page)
+            row = row_bottom = None
+            for i, line in enumerate(lines):
+                if columns is None:
+                    columns = _table_columns(line)
+                    if columns is not None:
+                        rep_name = _filer_field(lines[:i], 'Name:')
+                        district = _filer_field(lines[:i], 'State/District:')
+                    continue
+                text = _line_text(line)
+                if SECTION_END_RE.match(text):
+                    break
+                if _table_columns(line) is not None or FOOTER_RE.match(text):
+                    continue
+                if _starts_row(line, columns):
+                    row = _cells(line, columns)
+                    rows.append(row)
+                elif row is not None and line[0][1] - row_bottom < line[0][3] - line[0][1] \
+                        and not DETAIL_LABEL_RE.match(text):
+                    # Wrapped asset, type or amount text of the row above
+                    for column, words in _cells(line, columns).items():
+                        row.setdefault(column, []).extend(words)
+                else:
+                    row = None
+                if row is not None:
+                    row_bottom = max(word[3] for word in line)
+            else:
+                continue
+            break
+    if columns is None:
+        return None
+    records = []
+    for cells in rows:
+        record = _table_record(cells, year, doc_id, len(records) + 1, rep_name, district)
+        if record is not None:
+            records.append(record)
+    return records
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from congress_trades import db, metrics
+from congress_trades.disclosure_index import download_index, ptr_document_ids
+from congress_trades.ledger import find_new_documents
+
+
+# Filings in the FD index that are not yet in the ingestion ledger, or failed last time
+def fetch_new_document_ids(doc_ids):
+    with db.transaction() as conn:
+        return find_new_documents(conn, doc_ids)
+
+
+# Load this year's new and failed filings. The index is diffed against the ledger before
+# pandas, yfinance or PyMuPDF are imported, so a run with nothing new exits at once.
+def run(year=None):
+    year = year or datetime.now().year
+
+    # Step 1: Download the FD index containing document IDs
+    with metrics.timer('stage_seconds', stage='index'):
+        rows = download_index(year)
+    if rows is None:
+        print("Failed to retrieve document IDs.")
+        metrics.error('index', year=year)
+        return 0
+
+    # Step 2: Diff the index against the ingestion ledger to find new or failed filings
+    new_document_ids = fetch_new_document_ids(ptr_document_ids(rows))
+    print(f"{len(new_document_ids)} new or failed filings to process.")
+    if not new_document_ids:
+        return 0
+
+    # Step 3: Process PDFs for those filings and insert them into the database
+    from congress_trades.analytics import update_analytics
+    from congress_trades.filing_loader import FilingLoader
+    with FilingLoader() as loader:
+        loaded = loader.load(new_document_ids)
+    update_analytics()
+    return loaded
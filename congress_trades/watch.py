@@ -0,0 +1,51 @@
+import time
+from datetime import datetime
+
+from congress_trades import config, metrics
+from congress_trades.disclosure_index import INDEX_FAILED, IndexPoller, ptr_document_ids
+from congress_trades.update import fetch_new_document_ids
+
+
+# Poll the current year's FD index every interval seconds and load new filings as soon as they
+# are listed. Idle polls are conditional requests answered with 304, so they cost one round
+# trip and no database work. The filing loader (pandas, yfinance, PyMuPDF and the parse pool)
+# is started on the first new filing and kept for the rest of the run. Failed filings are
+# retried the next time the index changes. A poll whose index cannot be read, and any error while
+# loading, is counted with metrics.error and the watcher keeps polling. With once, a single poll
+# is made, and a failed one makes the command exit nonzero.
+def run(interval=config.WATCH_INTERVAL, once=False):
+    poller = IndexPoller()
+    loader = None
+    try:
+        while True:
+            started = time.monotonic()
+            year = datetime.now().year
+            with metrics.timer('stage_seconds', stage='index'):
+                rows = poller.poll(year)
+            if rows is INDEX_FAILED:
+                metrics.error('index', year=year)
+            elif rows is not None:
+                try:
+                    new_document_ids = fetch_new_document_ids(ptr_document_ids(rows))
+                    metrics.log('index_changed', year=year, new_filings=len(new_document_ids))
+                    print(f"{datetime.now():%Y-%m-%d %H:%M:%S} index changed, {len(new_document_ids)} new or failed filings.")
+                    if new_document_ids:
+                        if loader is None:
+                            from congress_trades.filing_loader import FilingLoader
+                            loader = FilingLoader()
+                        from congress_trades.analytics import update_analytics
+                        loader.load(new_document_ids)
+                        update_analytics()
+                except Exception as e:
+                    print(f"Error: {e}")
+                    metrics.error('load', year=year, error=str(e))
+                    poller.forget(year)
+            if once:
+                break
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        poller.close()
+        if loader is not None:
+            loader.close()
@@ -0,0 +1,131 @@
+import io
+
+from congress_trades.ledger import LOADED
+
+PENDING = 'pending'
+CLAIMED = 'claimed'
+DONE = 'done'
+FAILED = 'failed'
+
+
+# Add a year's (Year, DocID) filings to the queue. Filings the ledger already has as loaded are
+# added as done, so a year's tasks always cover its whole index; tasks already queued keep their
+# state. Returns the number of pending tasks added.
+def enqueue(conn, doc_ids):
+    buffer = io.StringIO()
+    for year, doc_id in doc_ids:
+        if str(doc_id).isdigit():
+            buffer.write(f"{int(year)}\t{int(doc_id)}\n")
+    buffer.seek(0)
+    with conn.cursor() as cursor:
+        cursor.execute("CREATE TEMP TABLE queue_staging (Year INT NOT NULL, DocID BIGINT NOT NULL) ON COMMIT DROP")
+        cursor.copy_expert("COPY queue_staging (Year, DocID) FROM STDIN", buffer)
+        cursor.execute("""
+        WITH added AS (
+            INSERT INTO congress_backfill_tasks (Year, DocID, Status)
+            SELECT DISTINCT s.Year, s.DocID,
+                   CASE WHEN l.Status = %s THEN %s ELSE %s END
+            FROM queue_staging s
+            LEFT JOIN congress_ingestion_ledger l ON l.Year = s.Year AND l.DocID = s.DocID
+            ON CONFLICT DO NOTHING
+            RETURNING Status
+        )
+        SELECT COUNT(*) FROM added WHERE Status = %s
+        """, (LOADED, DONE, PENDING, PENDING))
+        added = cursor.fetchone()[0]
+        cursor.execute("DROP TABLE queue_staging")
+        return added
+
+
+# Claim up to batch_size open tasks for a worker and lease them for lease_seconds. Pending tasks
+# and claimed tasks whose lease has passed (their worker died) are both claimable; expired tasks
+# that already had max_attempts claims are marked failed instead. Those keep their Worker and
+# Lease_Until, so a worker that was only slow can still close them with finish. SKIP LOCKED lets
+# concurrent workers claim disjoint batches without waiting on each other. Commit right away so
+# the lease is visible.
+def claim(conn, worker, batch_size, lease_seconds, max_attempts):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        UPDATE congress_backfill_tasks
+        SET Status = %s, Error = COALESCE(Error, 'lease expired'), Updated_At = now()
+        WHERE Status = %s AND Lease_Until < now() AND Attempts >= %s
+        """, (FAILED, CLAIMED, max_attempts))
+        cursor.execute("""
+        UPDATE congress_backfill_tasks t
+        SET Status = %s, Worker = %s, Attempts = t.Attempts + 1,
+            Lease_Until = now() + make_interval(secs => %s), Updated_At = now()
+        FROM (
+            SELECT Year, DocID FROM congress_backfill_tasks
+            WHERE (Status = %s OR (Status = %s AND Lease_Until < now())) AND Attempts < %s
+            ORDER BY Year, DocID
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        ) c
+        WHERE t.Year = c.Year AND t.DocID = c.DocID
+        RETURNING t.Year, t.DocID
+        """, (CLAIMED, worker, lease_seconds, PENDING, CLAIMED, max_attempts, batch_size))
+        return sorted((year, str(doc_id)) for year, doc_id in cursor.fetchall())
+
+
+# Close a task in the transaction that records its filing: done, or failed with its error.
+# A failed task is put back for another attempt until it has been claimed max_attempts times.
+# Only the worker that holds the claim can close it, also after its last lease ran out and the
+# task was failed for that (Lease_Until is only kept then). Returns False when the lease was lost
+# to another worker, whose result then stands.
+def finish(conn, year, doc_id, worker, error=None, max_attempts=1):
+    owned = "Year = %s AND DocID = %s AND Worker = %s AND (Status = %s OR (Status = %s AND Lease_Until IS NOT NULL))"
+    task = (int(year), int(doc_id), worker, CLAIMED, FAILED)
+    with conn.cursor() as cursor:
+        if error is None:
+            cursor.execute(f"""
+            UPDATE congress_backfill_tasks
+            SET Status = %s, Lease_Until = NULL, Error = NULL, Updated_At = now()
+            WHERE {owned}
+            """, (DONE, *task))
+        else:
+            cursor.execute(f"""
+            UPDATE congress_backfill_tasks
+            SET Status = CASE WHEN Attempts < %s THEN %s ELSE %s END,
+                Lease_Until = NULL, Error = %s, Updated_At = now()
+            WHERE {owned}
+            """, (max_attempts, PENDING, FAILED, str(error), *task))
+        return cursor.rowcount == 1
+
+
+# Extend the lease of every task a worker still holds, so a batch that runs long (clerk or
+# yfinance backoff) is not taken over while it is being worked on. Returns the number renewed.
+def renew(conn, worker, lease_seconds):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        UPDATE congress_backfill_tasks
+        SET Lease_Until = now() + make_interval(secs => %s), Updated_At = now()
+        WHERE Worker = %s AND Status = %s AND Lease_Until >= now()
+        """, (lease_seconds, worker, CLAIMED))
+        return cursor.rowcount
+
+
+# Number of tasks in each state
+def queue_status(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT Status, COUNT(*) FROM congress_backfill_tasks GROUP BY Status")
+        return dict(cursor.fetchall())
+
+
+# Tasks still pending or claimed: workers keep waiting for expiring leases until this reaches 0
+def open_tasks(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM congress_backfill_tasks WHERE Status IN (%s, %s)", (PENDING, CLAIMED))
+        return cursor.fetchone()[0]
+
+
+# Years with no open task left, with every filing queued for them
+def finished_years(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        SELECT Year, array_agg(DocID ORDER BY DocID)
+        FROM congress_backfill_tasks
+        GROUP BY Year
+        HAVING bool_and(Status NOT IN (%s, %s))
+        ORDER BY Year
+        """, (PENDING, CLAIMED))
+        return {year: [(year, str(doc_id)) for doc_id in doc_ids] for year, doc_ids in cursor.fetchall()}
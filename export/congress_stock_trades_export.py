@@ -0,0 +1,9 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from congress_trades.cli import main
+
+# Export changed years to Parquet: python -m congress_trades export
+if __name__ == "__main__":
+    sys.exit(main(['export', *sys.argv[1:]]))
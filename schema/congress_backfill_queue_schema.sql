@@ -0,0 +1,16 @@
+-- Work queue of a distributed backfill: one task per PTR filing, enqueued by
+-- `python -m congress_trades enqueue` and claimed by any number of `work` processes.
+CREATE TABLE congress_backfill_tasks (
+    Year INT NOT NULL,                                -- Filing year of the disclosure index
+    DocID BIGINT NOT NULL,                            -- Document ID of the PTR filing
+    Status VARCHAR(16) NOT NULL DEFAULT 'pending',    -- 'pending', 'claimed', 'done' or 'failed'
+    Attempts INT NOT NULL DEFAULT 0,                  -- Number of times the task was claimed
+    Worker TEXT,                                      -- host:pid of the worker that last claimed it
+    Lease_Until TIMESTAMPTZ,                          -- A claimed task whose lease has passed is claimable again
+    Error TEXT,                                       -- Last error of a failed attempt
+    Updated_At TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (Year, DocID)
+);
+
+-- Tasks workers can still claim, in claim order
+CREATE INDEX congress_backfill_tasks_open_idx ON congress_backfill_tasks (Year, DocID) WHERE Status IN ('pending', 'claimed');
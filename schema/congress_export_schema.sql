@@ -0,0 +1,27 @@
+-- Years of congress_stock_trades changed since their last Parquet export. Every change takes a
+-- new Version, so an export only clears the years it has written the latest version of.
+CREATE SEQUENCE congress_export_version;
+
+CREATE TABLE congress_export_dirty_years (
+    Year INT PRIMARY KEY,
+    Version BIGINT NOT NULL DEFAULT nextval('congress_export_version')
+);
+
+CREATE FUNCTION congress_export_mark_years() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO congress_export_dirty_years (Year)
+    SELECT DISTINCT Year FROM changed_rows
+    ON CONFLICT (Year) DO UPDATE SET Version = nextval('congress_export_version');
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER congress_export_inserted AFTER INSERT ON congress_stock_trades
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION congress_export_mark_years();
+CREATE TRIGGER congress_export_updated AFTER UPDATE ON congress_stock_trades
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION congress_export_mark_years();
+CREATE TRIGGER congress_export_deleted AFTER DELETE ON congress_stock_trades
+    REFERENCING OLD TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION congress_export_mark_years();
+
+-- Years already loaded are written by the first export
+INSERT INTO congress_export_dirty_years (Year) SELECT DISTINCT Year FROM congress_stock_trades;
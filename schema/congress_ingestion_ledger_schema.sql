@@ -0,0 +1,27 @@
+CREATE TABLE congress_ingestion_ledger (
+    Year INT NOT NULL,                                -- Filing year of the disclosure index
+    DocID BIGINT NOT NULL,                            -- Document ID of the PTR filing
+    Status VARCHAR(16) NOT NULL,                      -- 'loaded' or 'failed'
+    Content_Hash CHAR(64),                            -- SHA-256 of the PDF that was processed
+    Row_Count INT NOT NULL DEFAULT 0,                 -- Rows loaded into congress_stock_trades (0 is a valid result)
+    Attempts INT NOT NULL DEFAULT 1,                  -- Number of times the filing was processed
+    Error TEXT,                                       -- Last error for failed filings
+    First_Seen TIMESTAMPTZ NOT NULL DEFAULT now(),    -- First time the filing was processed
+    Updated_At TIMESTAMPTZ NOT NULL DEFAULT now(),    -- Last time the filing was processed
+    PRIMARY KEY (Year, DocID)
+);
+
+-- Failed filings, retried by the next run
+CREATE INDEX congress_ingestion_ledger_failed_idx ON congress_ingestion_ledger (Year, DocID) WHERE Status = 'failed';
+
+-- Years of the initial insert whose filings have all been loaded
+CREATE TABLE congress_ingestion_years (
+    Year INT PRIMARY KEY,                             -- Filing year of the disclosure index
+    Documents INT NOT NULL,                           -- PTR filings in the year's index
+    Completed_At TIMESTAMPTZ NOT NULL DEFAULT now()   -- When the last filing of the year was loaded
+);
+
+-- Seed the ledger from trades that are already loaded
+INSERT INTO congress_ingestion_ledger (Year, DocID, Status, Row_Count)
+SELECT Year, ID, 'loaded', COUNT(*) FROM congress_stock_trades GROUP BY Year, ID
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,45 @@
+-- Optional alternative to congress_stock_trades_schema.sql: the same table range-partitioned by Year.
+-- Use one or the other. Yearly partitions keep indexes small and let a year be reloaded or detached on its own.
+CREATE TABLE congress_stock_trades (
+    record_id SERIAL,               -- Auto-incrementing identifier
+    Year INT NOT NULL,              -- Year of the trade
+    ID BIGINT NOT NULL,             -- Document ID of the filing the trade was reported in
+    Line_Number SMALLINT NOT NULL,  -- Position of the trade within its filing
+    Representative VARCHAR(255),    -- Name of the representative
+    District VARCHAR(10),           -- District code
+    Transaction_Type CHAR(1),       -- Transaction type (P = Purchase, S = Sale)
+    Ticker VARCHAR(10),             -- Stock ticker symbol
+    Date DATE,                      -- Date of the transaction
+    Notification_Date DATE,         -- Date the transaction was reported
+    Amount NUMERIC(20, 6),          -- Amount involved in the trade
+    Average_Price NUMERIC(20, 6),   -- Average stock price on transaction date
+    Price_in_50_Days NUMERIC(20, 6),-- Stock price 50 days after the transaction
+    Price_in_100_Days NUMERIC(20, 6),-- Stock price 100 days after the transaction
+    Industry VARCHAR(255),          -- Industry of the stock
+    Sector VARCHAR(255),            -- Sector of the stock
+    Prices_Given_Up DATE,           -- Day update-prices stopped looking for the trade's missing future prices
+    PRIMARY KEY (record_id, Year),  -- Primary keys of partitioned tables must include the partition key
+    CONSTRAINT congress_stock_trades_natural_key UNIQUE (Year, ID, Line_Number)  -- One row per transaction line
+) PARTITION BY RANGE (Year);
+
+-- One partition per filing year, plus a default partition for anything outside the range
+DO $$
+BEGIN
+    FOR y IN 2012..2035 LOOP
+        EXECUTE format(
+            'CREATE TABLE congress_stock_trades_%s PARTITION OF congress_stock_trades FOR VALUES FROM (%s) TO (%s)',
+            y, y, y + 1
+        );
+    END LOOP;
+END $$;
+CREATE TABLE congress_stock_trades_default PARTITION OF congress_stock_trades DEFAULT;
+
+-- Trades by date, used by the price backfill and date-range analysis
+CREATE INDEX congress_stock_trades_date_idx ON congress_stock_trades (Date);
+
+-- Only the trades still waiting for a future price, so the price backfill scan stays small as the table grows;
+-- trades it has given up on drop out
+CREATE INDEX congress_stock_trades_missing_prices_idx ON congress_stock_trades (Date)
+    WHERE Prices_Given_Up IS NULL
+      AND (Price_in_50_Days IS NULL OR Price_in_50_Days = 'NaN'
+           OR Price_in_100_Days IS NULL OR Price_in_100_Days = 'NaN');
@@ -1,7 +1,8 @@
 CREATE TABLE congress_stock_trades (
     record_id SERIAL PRIMARY KEY,   -- Auto-incrementing primary key
     Year INT NOT NULL,              -- Year of the trade
-    ID BIGINT,                      -- Unique identifier for the trade
+    ID BIGINT NOT NULL,             -- Document ID of the filing the trade was reported in
+    Line_Number SMALLINT NOT NULL,  -- Position of the trade within its filing
     Representative VARCHAR(255),    -- Name of the representative
     District VARCHAR(10),           -- District code
     Transaction_Type CHAR(1),       -- Transaction type (P = Purchase, S = Sale)
@@ -13,5 +14,17 @@ CREATE TABLE congress_stock_trades (
     Price_in_50_Days NUMERIC(20, 6),-- Stock price 50 days after the transaction
     Price_in_100_Days NUMERIC(20, 6),-- Stock price 100 days after the transaction
     Industry VARCHAR(255),          -- Industry of the stock
-    Sector VARCHAR(255)             -- Sector of the stock
+    Sector VARCHAR(255),            -- Sector of the stock
+    Prices_Given_Up DATE,           -- Day update-prices stopped looking for the trade's missing future prices
+    CONSTRAINT congress_stock_trades_natural_key UNIQUE (Year, ID, Line_Number)  -- One row per transaction line
 );
+
+-- Trades by date, used by the price backfill and date-range analysis
+CREATE INDEX congress_stock_trades_date_idx ON congress_stock_trades (Date);
+
+-- Only the trades still waiting for a future price, so the price backfill scan stays small as the table grows;
+-- trades it has given up on drop out
+CREATE INDEX congress_stock_trades_missing_prices_idx ON congress_stock_trades (Date)
+    WHERE Prices_Given_Up IS NULL
+      AND (Price_in_50_Days IS NULL OR Price_in_50_Days = 'NaN'
+           OR Price_in_100_Days IS NULL OR Price_in_100_Days = 'NaN');
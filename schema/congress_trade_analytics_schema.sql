@@ -0,0 +1,97 @@
+-- Precomputed analytics over congress_stock_trades, refreshed incrementally by
+-- congress_trades/analytics.py after every load and price backfill.
+
+-- Trades inserted, changed or deleted since the last refresh
+CREATE TABLE congress_analytics_dirty (
+    record_id BIGINT PRIMARY KEY
+);
+
+CREATE FUNCTION congress_analytics_mark_dirty() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO congress_analytics_dirty (record_id)
+    SELECT DISTINCT record_id FROM changed_rows
+    ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER congress_analytics_inserted AFTER INSERT ON congress_stock_trades
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION congress_analytics_mark_dirty();
+CREATE TRIGGER congress_analytics_updated AFTER UPDATE ON congress_stock_trades
+    REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION congress_analytics_mark_dirty();
+CREATE TRIGGER congress_analytics_deleted AFTER DELETE ON congress_stock_trades
+    REFERENCING OLD TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION congress_analytics_mark_dirty();
+
+-- One row per trade with its returns and reporting lag
+CREATE TABLE congress_trade_returns (
+    record_id BIGINT PRIMARY KEY,       -- record_id of the trade in congress_stock_trades
+    Year INT NOT NULL,
+    Representative VARCHAR(255) NOT NULL,
+    Ticker VARCHAR(10) NOT NULL,
+    Sector VARCHAR(255) NOT NULL,
+    Transaction_Type CHAR(1),
+    Date DATE,
+    Amount NUMERIC(20, 6),
+    Notification_Lag_Days INT,          -- Days between the trade and its notification
+    Return_50_Days NUMERIC,             -- Price change from the trade date to 50 days later
+    Return_100_Days NUMERIC,            -- Price change from the trade date to 100 days later
+    Trade_Return_50_Days NUMERIC,       -- Return_50_Days as earned by the trade: negated for sales, NULL for exchanges
+    Trade_Return_100_Days NUMERIC       -- Return_100_Days as earned by the trade
+);
+
+CREATE INDEX congress_trade_returns_representative_idx ON congress_trade_returns (Representative, Date);
+CREATE INDEX congress_trade_returns_ticker_idx ON congress_trade_returns (Ticker, Date);
+
+-- Running sums and counts per representative, sector and ticker. Every column is additive, so a
+-- refresh only applies the difference made by the changed trades.
+CREATE TABLE congress_representative_stats (
+    Representative VARCHAR(255) PRIMARY KEY,
+    Trades INT NOT NULL,
+    Purchases INT NOT NULL,
+    Sales INT NOT NULL,
+    Amount NUMERIC NOT NULL,
+    Trade_Return_50_Sum NUMERIC NOT NULL,
+    Trade_Return_50_Count INT NOT NULL,
+    Trade_Return_100_Sum NUMERIC NOT NULL,
+    Trade_Return_100_Count INT NOT NULL,
+    Lag_Sum BIGINT NOT NULL,
+    Lag_Count INT NOT NULL,
+    Late_Notifications INT NOT NULL      -- Notified more than 45 days after the trade (STOCK Act deadline)
+);
+
+CREATE TABLE congress_sector_stats (LIKE congress_representative_stats);
+ALTER TABLE congress_sector_stats RENAME COLUMN Representative TO Sector;
+ALTER TABLE congress_sector_stats ADD PRIMARY KEY (Sector);
+
+CREATE TABLE congress_ticker_stats (LIKE congress_representative_stats);
+ALTER TABLE congress_ticker_stats RENAME COLUMN Representative TO Ticker;
+ALTER TABLE congress_ticker_stats ALTER COLUMN Ticker TYPE VARCHAR(10);
+ALTER TABLE congress_ticker_stats ADD PRIMARY KEY (Ticker);
+
+-- Dashboard views: averages over the running sums
+CREATE VIEW congress_representative_performance AS
+SELECT Representative, Trades, Purchases, Sales, Amount,
+       Trade_Return_50_Sum / NULLIF(Trade_Return_50_Count, 0) AS Avg_Trade_Return_50_Days,
+       Trade_Return_100_Sum / NULLIF(Trade_Return_100_Count, 0) AS Avg_Trade_Return_100_Days,
+       Lag_Sum::NUMERIC / NULLIF(Lag_Count, 0) AS Avg_Notification_Lag_Days,
+       Late_Notifications
+FROM congress_representative_stats;
+
+CREATE VIEW congress_sector_performance AS
+SELECT Sector, Trades, Purchases, Sales, Amount,
+       Trade_Return_50_Sum / NULLIF(Trade_Return_50_Count, 0) AS Avg_Trade_Return_50_Days,
+       Trade_Return_100_Sum / NULLIF(Trade_Return_100_Count, 0) AS Avg_Trade_Return_100_Days,
+       Lag_Sum::NUMERIC / NULLIF(Lag_Count, 0) AS Avg_Notification_Lag_Days,
+       Late_Notifications
+FROM congress_sector_stats;
+
+CREATE VIEW congress_ticker_performance AS
+SELECT Ticker, Trades, Purchases, Sales, Amount,
+       Trade_Return_50_Sum / NULLIF(Trade_Return_50_Count, 0) AS Avg_Trade_Return_50_Days,
+       Trade_Return_100_Sum / NULLIF(Trade_Return_100_Count, 0) AS Avg_Trade_Return_100_Days,
+       Lag_Sum::NUMERIC / NULLIF(Lag_Count, 0) AS Avg_Notification_Lag_Days,
+       Late_Notifications
+FROM congress_ticker_stats;
+
+-- Trades already loaded are picked up by the first refresh
+INSERT INTO congress_analytics_dirty (record_id) SELECT record_id FROM congress_stock_trades;
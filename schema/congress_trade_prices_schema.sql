@@ -0,0 +1,12 @@
+-- Closes at the price horizons of CONGRESS_TRADES_PRICE_HORIZONS that have no column in
+-- congress_stock_trades (e.g. 7, 30 or 365 days), one row per trade and horizon, so a new horizon
+-- needs no schema change. Only required when such horizons are configured.
+CREATE TABLE congress_trade_prices (
+    Year INT NOT NULL,              -- Natural key of the trade in congress_stock_trades
+    ID BIGINT NOT NULL,
+    Line_Number SMALLINT NOT NULL,
+    Horizon_Days SMALLINT NOT NULL, -- Days after the transaction date
+    Price NUMERIC(20, 6) NOT NULL,  -- Close on the first trading day on or after Date + Horizon_Days
+    PRIMARY KEY (Year, ID, Line_Number, Horizon_Days),
+    FOREIGN KEY (Year, ID, Line_Number) REFERENCES congress_stock_trades (Year, ID, Line_Number) ON DELETE CASCADE
+);